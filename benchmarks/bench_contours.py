@@ -0,0 +1,82 @@
+'''
+Contour drawing benchmark.
+
+Compares the old per-contour drawContours loop against the label image and
+palette lookup of draw_contours() on noisy synthetic edge maps.  Only needs
+the bpy-free pipeline module:
+
+    python benchmarks/bench_contours.py --density 0.005
+'''
+
+import argparse
+import os
+import random as rng
+import sys
+import time
+
+import cv2 as cv
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                os.pardir))
+from image_voodoo import pipeline  # noqa: E402
+
+
+SIZES = {'1K': (1024, 768), '2K': (1920, 1080), '4K': (3840, 2160)}
+
+
+# Canny on blurred noise, lots of short wiggly contours like a grainy scan
+def synthetic_edges(width, height, density, seed=12345):
+    gen = np.random.default_rng(seed)
+    noise = (gen.random((height, width)) < density).astype(np.uint8) * 255
+    return cv.Canny(cv.GaussianBlur(noise, (5, 5), 0), 20, 60)
+
+
+# The loop CannyEdges used before draw_contours was vectorized.  Every
+# drawContours call walks the contour list, so it grows with the square of
+# the contour count.
+def legacy_contours(edges, seed=12345):
+    colors = rng.Random(seed)
+    contours, hierarchy = cv.findContours(edges, cv.RETR_TREE,
+                                          cv.CHAIN_APPROX_SIMPLE)
+    drawing = np.zeros((edges.shape[0], edges.shape[1], 3), dtype=np.uint8)
+    for i in range(len(contours)):
+        color = (colors.randint(0, 256), colors.randint(0, 256),
+                 colors.randint(0, 256))
+        cv.drawContours(drawing, contours, i, color, 1,
+                        cv.LINE_8, hierarchy, 0)
+    return drawing, len(contours)
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument('--density', type=float, default=0.005,
+                        help='fraction of noise pixels before blurring')
+    parser.add_argument('--sizes', nargs='+', default=['1K'],
+                        choices=list(SIZES))
+    args = parser.parse_args(argv)
+
+    print('{:>4} {:>10} {:>10} {:>10} {:>8} {:>8}'.format(
+        'size', 'contours', 'legacy s', 'labels s', 'speedup', 'overlap'))
+    for label in args.sizes:
+        width, height = SIZES[label]
+        edges = synthetic_edges(width, height, args.density)
+        (old, count), old_t = timed(legacy_contours, edges)
+        new, new_t = timed(pipeline.draw_contours, edges)
+        # Colors differ, the drawn pixels should mostly be the same ones
+        old_on, new_on = old.any(axis=2), new.any(axis=2)
+        overlap = (old_on & new_on).sum() / max((old_on | new_on).sum(), 1)
+        print('{:>4} {:>10} {:>10.2f} {:>10.3f} {:>7.0f}x {:>7.1%}'.format(
+            label, count, old_t, new_t, old_t / new_t, overlap))
+
+
+if __name__ == '__main__':
+    argv = sys.argv[sys.argv.index('--') + 1:] if '--' in sys.argv else \
+        sys.argv[1:]
+    main(argv)
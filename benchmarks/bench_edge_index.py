@@ -0,0 +1,142 @@
+'''
+Nearest edge query benchmark.
+
+Times building an EdgeIndex over a view's edge vertices and querying it, in
+one batch and one point at a time, checked against a brute force search.
+Snapping along the segments of a simplified contour mesh is checked on a
+long straight segment and against a brute force search too.  Under
+Blender it also times mathutils.kdtree on the same points:
+
+    python benchmarks/bench_edge_index.py --counts 1000000
+    blender -b --python benchmarks/bench_edge_index.py
+'''
+
+import argparse
+import os
+import sys
+import time
+
+import cv2 as cv
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                os.pardir))
+from image_voodoo import pipeline  # noqa: E402
+
+try:
+    from mathutils.kdtree import KDTree
+except ImportError:
+    KDTree = None
+
+
+COUNTS = [100000, 1000000, 5000000]
+QUERIES = 10000
+
+# A top view of an 8K image shown 5 m wide, lifted off the ground
+MATRIX = np.eye(4)
+MATRIX[2, 3] = 0.25
+TRANSFORM = pipeline.pixel_transform(MATRIX, 5.0, (8192, 6144))
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+# Squared distance to the nearest vertex for a few queries, the slow way
+def brute_force(verts, queries):
+    return np.array([((verts[:, :2] - query[:2]) ** 2).sum(axis=1).min()
+                     for query in queries])
+
+
+# Distance to the nearest point of any (a, b) segment, the slow way
+def brute_force_segments(starts, ends, queries):
+    along = ends - starts
+    result = []
+    for query in queries:
+        t = np.clip(((query - starts) * along).sum(axis=1) /
+                    (along * along).sum(axis=1), 0, 1)
+        closest = starts + t[:, None] * along
+        result.append(np.sqrt(((closest - query) ** 2).sum(axis=1).min()))
+    return np.array(result)
+
+
+# A contour mesh snaps onto its segments, not to their far away corners.
+# The short strokes beside the long segment put more vertices nearer the
+# query than either of its ends.
+def check_segments(gen):
+    strokes = [[2 + i * 0.1, 0.3, 0.25] for i in range(11)]
+    verts = np.array([[0, 0, 0.25], [5, 0, 0.25]] + strokes)
+    edges = [[0, 1]] + [[i, i + 1] for i in range(2, 12)]
+    index = pipeline.EdgeIndex(verts, MATRIX, edges)
+    snapped, moved = index.snap([[2.5, 0.05, 0.5]], 0.1)
+    assert moved[0] and np.allclose(snapped, [[2.5, 0, 0.5]]), \
+        'query near the middle of a segment snapped to a corner'
+
+    edges = np.zeros((1000, 1000), dtype=np.uint8)
+    for x, y, radius in gen.integers(0, 1000, (60, 3)):
+        cv.circle(edges, (int(x), int(y)), int(radius) // 4 + 5, 255, 1)
+    pixels, pairs = pipeline.contour_polylines(edges, epsilon=1.0)
+    verts = pipeline.transform_points(TRANSFORM, pixels)
+    index = pipeline.EdgeIndex(verts, MATRIX, pairs)
+    queries = pipeline.transform_points(TRANSFORM, gen.random(
+        (200, 2)) * 1000).astype(np.float64)
+    distance = index.nearest_points(queries)[1]
+    expected = brute_force_segments(verts[pairs[:, 0], :2].astype(float),
+                                    verts[pairs[:, 1], :2].astype(float),
+                                    queries[:, :2])
+    assert np.allclose(distance, expected, atol=1e-5), \
+        'nearest segment points differ'
+
+
+def kdtree_queries(verts, queries):
+    tree = KDTree(len(verts))
+    for i, vert in enumerate(verts.tolist()):
+        tree.insert(vert, i)
+    tree.balance()
+    start = time.perf_counter()
+    for query in queries.tolist():
+        tree.find(query)
+    return (time.perf_counter() - start) / len(queries)
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument('--counts', type=int, nargs='+', default=COUNTS)
+    args = parser.parse_args(argv)
+
+    gen = np.random.default_rng(12345)
+    check_segments(gen)
+
+    print('{:>9} {:>9} {:>10} {:>10} {:>12}'.format(
+        'verts', 'build s', 'batch us', 'single us', 'kdtree us'))
+    for count in args.counts:
+        pixels = np.column_stack([gen.integers(0, 8192, count),
+                                  gen.integers(0, 6144, count)])
+        verts = pipeline.transform_points(TRANSFORM, pixels)
+        # Vertices of a model being traced, near the plane but off it
+        queries = pipeline.transform_points(TRANSFORM, gen.random(
+            (QUERIES, 2)) * (8192, 6144)).astype(np.float64)
+        queries[:, 2] += gen.random(QUERIES)
+
+        index, build_t = timed(pipeline.EdgeIndex, verts, MATRIX)
+        (found, distance), batch_t = timed(index.nearest, queries)
+        start = time.perf_counter()
+        for query in queries[:1000]:
+            index.nearest(query)
+        single_t = (time.perf_counter() - start) / 1000
+        assert np.allclose(distance[:50] ** 2,
+                           brute_force(verts, queries[:50]), atol=1e-9), \
+            'nearest vertices differ'
+
+        kdtree = '-' if KDTree is None else '{:.1f}'.format(
+            kdtree_queries(verts, queries[:1000]) * 1e6)
+        print('{:>9} {:>9.2f} {:>10.2f} {:>10.2f} {:>12}'.format(
+            count, build_t, batch_t / QUERIES * 1e6, single_t * 1e6, kdtree))
+
+
+if __name__ == '__main__':
+    argv = sys.argv[sys.argv.index('--') + 1:] if '--' in sys.argv else \
+        sys.argv[1:]
+    main(argv)
@@ -0,0 +1,95 @@
+'''
+Edge pixel extraction benchmark.
+
+Compares the old per-pixel loop from ImagetoCSV against edge_points() on
+synthetic edge maps.  Only needs the bpy-free pipeline module:
+
+    python benchmarks/bench_edge_points.py --density 0.05
+'''
+
+import argparse
+import math
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                os.pardir))
+from image_voodoo import pipeline  # noqa: E402
+
+
+SIZES = {'4K': (3840, 2160), '8K': (7680, 4320)}
+
+
+# Random sparse edge map, white edges on black like cv.Canny output
+def synthetic_edges(width, height, density, seed=12345):
+    gen = np.random.default_rng(seed)
+    return np.where(gen.random((height, width)) < density, 255,
+                    0).astype(np.uint8)
+
+
+# The loop ImagetoCSV used before edge_points (without the per-pixel print)
+def legacy_points(edges):
+    height, width = edges.shape
+    pixel = edges.ravel().tolist()
+    x_coord = []
+    y_coord = []
+    coords = []
+    counter = 0
+    for i in range(0, width * height):
+        if pixel[i] >= 128:
+            x_coord.append([(counter) % width])
+            if counter == 0:
+                y_coord.append([math.ceil(counter + 1 / width)])
+            else:
+                y_coord.append([math.ceil(counter / width) *
+                                (-1) + height])
+        counter += 1
+    z_coord = np.ones((len(x_coord), 1))
+    for i in range(0, len(x_coord)):
+        coords.append(np.append(x_coord[i], y_coord[i]))
+    return np.hstack((coords, z_coord))
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument('--density', type=float, default=0.05,
+                        help='fraction of pixels that are edges')
+    parser.add_argument('--sizes', nargs='+', default=list(SIZES),
+                        choices=list(SIZES))
+    parser.add_argument('--skip-legacy', action='store_true',
+                        help='only time the vectorized path')
+    args = parser.parse_args(argv)
+
+    print('{:>4} {:>12} {:>10} {:>10} {:>8}'.format(
+        'size', 'points', 'legacy s', 'numpy s', 'speedup'))
+    for label in args.sizes:
+        width, height = SIZES[label]
+        edges = synthetic_edges(width, height, args.density)
+        new, new_t = timed(pipeline.edge_points, edges)
+
+        if args.skip_legacy:
+            print('{:>4} {:>12} {:>10} {:>10.3f} {:>8}'.format(
+                label, len(new), '-', new_t, '-'))
+            continue
+
+        old, old_t = timed(legacy_points, edges)
+        # The old loop put column 0 pixels one row too high, compare the rest
+        mask = new[:, 0] != 0
+        assert np.array_equal(old[mask], new[mask]), 'point sets differ'
+        print('{:>4} {:>12} {:>10.2f} {:>10.3f} {:>7.0f}x'.format(
+            label, len(new), old_t, new_t, old_t / new_t))
+
+
+if __name__ == '__main__':
+    argv = sys.argv[sys.argv.index('--') + 1:] if '--' in sys.argv else \
+        sys.argv[1:]
+    main(argv)
@@ -0,0 +1,84 @@
+'''
+Object extent benchmark.
+
+Times object_extent() in both modes on synthetic line drawings of an object,
+bare and inside a frame drawn around the sheet, and checks that the frame is
+never taken for the object.  Also runs on the README screenshot
+images/cla250.jpg, whose panel border is the largest contour in it.  Only
+needs the bpy-free pipeline module:
+
+    python benchmarks/bench_extent.py --size 4096 3072
+'''
+
+import argparse
+import os
+import sys
+import time
+
+import cv2 as cv
+import numpy as np
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+sys.path.insert(0, ROOT)
+from image_voodoo import pipeline  # noqa: E402
+
+
+# Frames drawn around the sheet: none, on the very edge and inset a little
+FRAMES = {'bare': None, 'edge': 0, 'inset': 12}
+
+
+# A side view of a car as outlines on white, with an optional frame inset
+# by frame pixels.  Returns the drawing and the car's (x, y, w, h) box.
+def framed_drawing(width, height, frame):
+    image = np.full((height, width), 255, dtype=np.uint8)
+    left, top = width // 5, height // 3
+    right, bottom = width - width // 5, height - height // 4
+    wheel = (bottom - top) // 4
+    cv.rectangle(image, (left, top + wheel), (right, bottom - wheel), 0, 3)
+    cv.rectangle(image, (left + wheel * 2, top), (right - wheel * 3,
+                                                  top + wheel), 0, 3)
+    for x in (left + wheel * 2, right - wheel * 2):
+        cv.circle(image, (x, bottom - wheel), wheel, 0, 3)
+    if frame is not None:
+        cv.rectangle(image, (frame, frame),
+                     (width - 1 - frame, height - 1 - frame), 0, 3)
+    return image, (left - 1, top - 1, right - left + 3, bottom - top + 3)
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument('--size', type=int, nargs=2, default=[2048, 1536],
+                        metavar=('WIDTH', 'HEIGHT'))
+    args = parser.parse_args(argv)
+    width, height = args.size
+
+    print('{:>8} {:>24} {:>24} {:>8} {:>8}'.format(
+        'frame', 'contour', 'percentile', 'c ms', 'p ms'))
+    for label, frame in FRAMES.items():
+        drawing, expected = framed_drawing(width, height, frame)
+        edges = pipeline.detect(drawing, 'CANNY', 50, 150)
+        box, contour_t = timed(pipeline.object_extent, edges)
+        trimmed, percentile_t = timed(pipeline.object_extent, edges,
+                                      'PERCENTILE')
+        assert np.allclose(box, expected, atol=3), \
+            '{} frame: extent {} instead of {}'.format(label, box, expected)
+        print('{:>8} {:>24} {:>24} {:>8.1f} {:>8.1f}'.format(
+            label, str(box), str(trimmed), contour_t * 1e3,
+            percentile_t * 1e3))
+
+    gray = pipeline.read_gray(os.path.join(ROOT, 'images', 'cla250.jpg'))
+    edges = pipeline.detect(gray, 'BILATERAL', 30, 200)
+    box = pipeline.object_extent(edges)
+    assert box[2] < 0.95 * gray.shape[1], 'cla250.jpg: took the border'
+    print('{:>8} {:>24} {:>24}'.format('cla250', str(box), str(
+        pipeline.object_extent(edges, 'PERCENTILE'))))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,101 @@
+'''
+Edge mesh construction benchmark.
+
+Compares the old list-based augmented_verts + from_pydata path, rebuilt here
+as legacy_mesh since the add-on no longer has it, against the current
+transform_points + foreach_set path of fill_mesh.  Needs bpy, so run it with
+Blender:
+
+    blender -b --python benchmarks/bench_mesh_build.py --counts 100000
+'''
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+import bpy
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                os.pardir))
+from image_voodoo import pipeline  # noqa: E402
+
+
+COUNTS = [100000, 1000000, 5000000]
+
+# Placement numbers for a 5 m wide top view of an 8K image
+PLACEMENT = (-2.5, 1.875, 1638.4, 1638.4, 3.75, 1)
+TRANSFORM = pipeline.pixel_transform(np.eye(4), 5.0, (8192, 6144))
+
+# The old path put points on pixel corners, the new one on pixel centres
+HALF_PIXEL = 0.5 / 1638.4
+
+
+# The top view branch of the old augmented_verts, then from_pydata
+def legacy_mesh(raw_vert_list):
+    h_co, v_co, horiz_scfactor, vert_scfactor, im_height, unit_sc = PLACEMENT
+    aug_v = []
+    unit_sc = 1/unit_sc
+    v_co = v_co - im_height
+    for vert in raw_vert_list:
+        aug_v.append([(vert[0]/horiz_scfactor + h_co) * unit_sc,
+                     (vert[1]/vert_scfactor + v_co) * unit_sc, 0])
+    mesh = bpy.data.meshes.new(name="Legacy Mesh")
+    mesh.from_pydata(aug_v, [], [])
+    return mesh
+
+
+def bulk_mesh(coords):
+    verts = pipeline.transform_points(TRANSFORM, coords)
+    mesh = bpy.data.meshes.new(name="Bulk Mesh")
+    mesh.vertices.add(len(verts))
+    mesh.vertices.foreach_set("co", verts.ravel())
+    mesh.update()
+    return mesh
+
+
+# Wall time and peak Python-side allocation of one build
+def measure(func, *args):
+    tracemalloc.start()
+    start = time.perf_counter()
+    mesh = func(*args)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    co = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+    mesh.vertices.foreach_get("co", co)
+    bpy.data.meshes.remove(mesh)
+    return co, elapsed, peak / 2**20
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument('--counts', type=int, nargs='+', default=COUNTS)
+    args = parser.parse_args(argv)
+
+    gen = np.random.default_rng(12345)
+
+    print('{:>9} {:>10} {:>10} {:>12} {:>12} {:>8}'.format(
+        'verts', 'legacy s', 'bulk s', 'legacy MB', 'bulk MB', 'speedup'))
+    for count in args.counts:
+        coords = np.ones((count, 3))
+        coords[:, 0] = gen.integers(0, 8192, count)
+        coords[:, 1] = gen.integers(0, 6144, count)
+        # The legacy path was fed the list of tuples open_csv builds
+        raw = [tuple(row) for row in coords.tolist()]
+
+        old, old_t, old_mb = measure(legacy_mesh, raw)
+        del raw
+        new, new_t, new_mb = measure(bulk_mesh, coords)
+        assert np.allclose(old, new, atol=HALF_PIXEL + 1e-4), \
+            'vertex positions differ'
+        print('{:>9} {:>10.2f} {:>10.3f} {:>12.1f} {:>12.1f} {:>7.0f}x'
+              .format(count, old_t, new_t, old_mb, new_mb, old_t / new_t))
+
+
+if __name__ == '__main__':
+    argv = sys.argv[sys.argv.index('--') + 1:] if '--' in sys.argv else \
+        sys.argv[1:]
+    main(argv)
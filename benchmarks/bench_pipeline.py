@@ -0,0 +1,228 @@
+'''
+Image to mesh pipeline benchmark.
+
+Times every stage of the Canny Edges -> Create Point File -> Import Edge
+Pixels path on synthetic reference images of several sizes and edge
+densities, and checks the times against a saved baseline.  The NumPy and
+OpenCV stages only need the bpy-free pipeline module; run it under Blender
+to time the mesh build as well:
+
+    python benchmarks/bench_pipeline.py --save baseline.json
+    python benchmarks/bench_pipeline.py --compare baseline.json
+    blender -b --python benchmarks/bench_pipeline.py -- --sizes 4K 8K
+
+Results are JSON with the machine and library versions.  --compare exits
+with status 1 when a stage got slower than --threshold times its baseline.
+'''
+
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+import cv2 as cv
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                os.pardir))
+from image_voodoo import pipeline  # noqa: E402
+
+try:
+    import bpy
+except ImportError:
+    bpy = None
+
+
+SIZES = {'1K': (1024, 768), '2K': (2048, 1536), '4K': (4096, 3072),
+         '8K': (8192, 6144), '16K': (16384, 12288)}
+
+# Shapes drawn per megapixel of reference image
+DENSITIES = {'sparse': 20, 'medium': 200, 'dense': 2000}
+
+# Stages faster than this are left out of the regression check, their
+# times are mostly timer noise
+NOISE_FLOOR = 0.005
+
+
+# A line drawing on paper: outlines, circles and strokes on a slightly
+# uneven background, saved as a JPEG like a scanned blueprint
+def synthetic_reference(filename, width, height, shapes_per_mp, seed=12345):
+    gen = np.random.default_rng(seed)
+    image = np.full((height, width, 3), 235, dtype=np.uint8)
+    shade = cv.resize(gen.integers(215, 256, (8, 8), dtype=np.uint8),
+                      (width, height), interpolation=cv.INTER_CUBIC)
+    image[:] = shade[:, :, None]
+
+    count = max(1, int(shapes_per_mp * width * height / 1e6))
+    scale = min(width, height)
+    for kind, x, y, size, ink in zip(
+            gen.integers(0, 3, count), gen.integers(0, width, count),
+            gen.integers(0, height, count),
+            gen.integers(scale // 100 + 2, scale // 8 + 3, count),
+            gen.integers(0, 90, count)):
+        color = (int(ink),) * 3
+        thickness = 1 + width // 4096
+        if kind == 0:
+            cv.rectangle(image, (int(x), int(y)),
+                         (int(x + size), int(y + size // 2)), color,
+                         thickness)
+        elif kind == 1:
+            cv.circle(image, (int(x), int(y)), int(size // 2), color,
+                      thickness)
+        else:
+            cv.line(image, (int(x), int(y)),
+                    (int(x + size), int(y - size // 3)), color, thickness)
+    cv.imwrite(filename, image, [cv.IMWRITE_JPEG_QUALITY, 92])
+
+
+# One pass of the add-on's path through a reference file, returning its
+# Profile and the number of edge points
+def run_pipeline(filename, folder, args):
+    timings = pipeline.Profile()
+    detector = args.detector.upper()
+
+    # Canny Edges
+    if args.tile_size:
+        points_file = os.path.join(folder, 'view-pts.bin')
+        with pipeline.PointWriter(points_file) as writer:
+            edges, shown, drawing = pipeline.tiled_reference(
+                filename, args.filter1, args.filter2, None, detector,
+                args.tile_size, writer=writer, display_edge=2048,
+                contours=True, timings=timings)
+        with pipeline.stage(timings, 'encode'):
+            pipeline.encode_png(shown)
+            pipeline.encode_png(drawing)
+    else:
+        edges, drawing = pipeline.process_reference(
+            filename, args.filter1, args.filter2, None, detector, timings)
+        with pipeline.stage(timings, 'encode'):
+            pipeline.encode_png(edges)
+            pipeline.encode_png(drawing)
+
+        # Create Point File
+        points_file = os.path.join(folder, 'view-pts.bin')
+        pipeline.stream_points(points_file, edges, timings=timings)
+
+    # Import Edge Pixels
+    height, width = edges.shape
+    with pipeline.stage(timings, 'parse'):
+        points = np.array(pipeline.read_points(points_file))
+    transform = pipeline.pixel_transform(np.eye(4), 5.0, (width, height))
+    with pipeline.stage(timings, 'transform'):
+        verts = pipeline.transform_points(transform, points)
+    if bpy is not None:
+        with pipeline.stage(timings, 'mesh'):
+            mesh = bpy.data.meshes.new(name="Bench Mesh")
+            mesh.vertices.add(len(verts))
+            mesh.vertices.foreach_set("co", verts.ravel())
+            mesh.update()
+        bpy.data.meshes.remove(mesh)
+    return timings, len(points)
+
+
+# Fastest of several runs for every stage, the least noisy estimate
+def best_of(runs):
+    return {name: min(run[name] for run in runs) for name in runs[0]}
+
+
+# Stages at least threshold times slower than the baseline, as
+# (case, stage, baseline seconds, seconds)
+def regressions(results, baseline, threshold):
+    slower = []
+    for case, result in results['cases'].items():
+        before = baseline['cases'].get(case)
+        if before is None:
+            continue
+        for name, seconds in result['stages'].items():
+            old = before['stages'].get(name)
+            if old is None or max(old, seconds) < NOISE_FLOOR:
+                continue
+            if seconds > old * threshold:
+                slower.append((case, name, old, seconds))
+    return slower
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(
+        description=__doc__.strip(),
+        formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', nargs='+', default=['1K', '2K', '4K'],
+                        choices=list(SIZES))
+    parser.add_argument('--densities', nargs='+', default=list(DENSITIES),
+                        choices=list(DENSITIES))
+    parser.add_argument('--detector', default='bilateral',
+                        choices=[name.lower() for name in pipeline.DETECTORS])
+    parser.add_argument('--filter1', type=int, default=30)
+    parser.add_argument('--filter2', type=int, default=200)
+    parser.add_argument('--tile-size', type=int, default=0,
+                        help='time the tiled path with this tile size')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='runs per case, the fastest counts')
+    parser.add_argument('--save', metavar='FILE',
+                        help='write the results as JSON')
+    parser.add_argument('--compare', metavar='FILE',
+                        help='baseline results to check against')
+    parser.add_argument('--threshold', type=float, default=1.25,
+                        help='slowdown ratio counted as a regression')
+    args = parser.parse_args(argv)
+
+    results = {'platform': platform.platform(),
+               'cpus': os.cpu_count(),
+               'python': platform.python_version(),
+               'numpy': np.__version__, 'opencv': cv.__version__,
+               'blender': bpy.app.version_string if bpy else None,
+               'detector': args.detector, 'tile_size': args.tile_size,
+               'repeat': args.repeat, 'cases': {}}
+
+    print('{:>4} {:>7} {:>9} {:>9}  {}'.format(
+        'size', 'density', 'points', 'total s', 'stages (ms)'))
+    with tempfile.TemporaryDirectory() as folder:
+        for label in args.sizes:
+            width, height = SIZES[label]
+            for density in args.densities:
+                filename = os.path.join(folder, 'top.jpg')
+                synthetic_reference(filename, width, height,
+                                    DENSITIES[density])
+                runs = []
+                for i in range(args.repeat):
+                    start = time.perf_counter()
+                    timings, count = run_pipeline(filename, folder, args)
+                    timings['total'] = time.perf_counter() - start
+                    runs.append(timings)
+                stages = best_of(runs)
+                total = stages.pop('total')
+                results['cases']['{}/{}'.format(label, density)] = {
+                    'width': width, 'height': height, 'points': count,
+                    'edge_fraction': count / (width * height),
+                    'total': total, 'stages': stages}
+                print('{:>4} {:>7} {:>9} {:>9.2f}  {}'.format(
+                    label, density, count, total, ', '.join(
+                        '{} {:.0f}'.format(name, seconds * 1000)
+                        for name, seconds in stages.items())))
+
+    if args.save:
+        with open(args.save, 'w') as json_file:
+            json.dump(results, json_file, indent=2)
+        print('results saved to {}'.format(args.save))
+
+    if args.compare:
+        with open(args.compare) as json_file:
+            baseline = json.load(json_file)
+        slower = regressions(results, baseline, args.threshold)
+        for case, name, old, seconds in slower:
+            print('REGRESSION {} {}: {:.1f} ms -> {:.1f} ms ({:.2f}x)'.format(
+                case, name, old * 1000, seconds * 1000, seconds / old))
+        if slower:
+            return 1
+        print('no stage slower than {:.2f}x its baseline'.format(
+            args.threshold))
+    return 0
+
+
+if __name__ == '__main__':
+    argv = sys.argv[sys.argv.index('--') + 1:] if '--' in sys.argv else \
+        sys.argv[1:]
+    sys.exit(main(argv))
@@ -0,0 +1,87 @@
+'''
+Point file benchmark.
+
+Compares file size and load time of the legacy -pts.txt CSV against the
+binary -pts.bin point file.  Only needs the bpy-free pipeline module:
+
+    python benchmarks/bench_point_files.py --counts 1000000
+'''
+
+import argparse
+import csv
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                os.pardir))
+from image_voodoo import pipeline  # noqa: E402
+
+
+COUNTS = [100000, 1000000, 5000000]
+WIDTH, HEIGHT = 8192, 6144
+
+
+def write_csv(filename, coords):
+    with open(filename, 'w', newline='') as csv_file:
+        writer = csv.writer(csv_file)
+        writer.writerows(coords)
+
+
+# The row by row parse ImportPixels does for CSV files
+def load_csv(filename):
+    v = []
+    with open(filename) as csv_file:
+        for row in csv.reader(csv_file, delimiter=','):
+            v.append((float(row[0]), float(row[1]), float(row[2])))
+    return np.asarray(v, dtype=np.float32)
+
+
+# Map the binary file into the float array Import Edge Pixels hands to
+# transform_points
+def load_binary(filename):
+    return np.asarray(pipeline.read_points(filename), dtype=np.float32)
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument('--counts', type=int, nargs='+', default=COUNTS)
+    args = parser.parse_args(argv)
+
+    gen = np.random.default_rng(12345)
+
+    print('{:>9} {:>9} {:>9} {:>10} {:>10} {:>8}'.format(
+        'points', 'csv MB', 'bin MB', 'csv load', 'bin load', 'speedup'))
+    with tempfile.TemporaryDirectory() as folder:
+        txt = os.path.join(folder, 'view-pts.txt')
+        binary = os.path.join(folder, 'view-pts.bin')
+        for count in args.counts:
+            coords = np.ones((count, 3))
+            coords[:, 0] = gen.integers(0, WIDTH, count)
+            coords[:, 1] = gen.integers(0, HEIGHT, count)
+
+            write_csv(txt, coords)
+            pipeline.write_points(binary, coords, WIDTH, HEIGHT)
+
+            old, old_t = timed(load_csv, txt)
+            new, new_t = timed(load_binary, binary)
+            assert np.array_equal(old[:, :2], new), 'points differ'
+            print('{:>9} {:>9.1f} {:>9.1f} {:>10.2f} {:>10.4f} {:>7.0f}x'
+                  .format(count, os.path.getsize(txt) / 2**20,
+                          os.path.getsize(binary) / 2**20, old_t, new_t,
+                          old_t / new_t))
+
+
+if __name__ == '__main__':
+    argv = sys.argv[sys.argv.index('--') + 1:] if '--' in sys.argv else \
+        sys.argv[1:]
+    main(argv)
@@ -0,0 +1,69 @@
+'''
+Display proxy benchmark.
+
+Times proxy_pixels(), which decodes at a reduced size where it can, against
+a full decode shrunk afterwards, and checks that every proxy comes out at
+exactly proxy_shape() of the full size, the size the add-on gives its
+plane.  Only needs the bpy-free pipeline module:
+
+    python benchmarks/bench_proxy.py --max-edge 512
+'''
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import cv2 as cv
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                os.pardir))
+from image_voodoo import pipeline  # noqa: E402
+
+
+# Sizes whose reduced decodes round away from the proxy's aspect, and a few
+# ordinary ones
+SIZES = [(2047, 1097), (3001, 1601), (4095, 2183), (1999, 1333),
+         (4000, 3000), (8192, 6144), (300, 200)]
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument('--max-edge', type=int, nargs='+',
+                        default=[256, 512, 1024])
+    args = parser.parse_args(argv)
+
+    gen = np.random.default_rng(12345)
+    print('{:>11} {:>6} {:>11} {:>9} {:>9}'.format(
+        'size', 'edge', 'proxy', 'proxy ms', 'full ms'))
+    with tempfile.TemporaryDirectory() as folder:
+        for width, height in SIZES:
+            filename = os.path.join(folder, 'top.jpg')
+            cv.imwrite(filename, gen.integers(
+                0, 256, (height, width, 3), dtype=np.uint8))
+            for max_edge in args.max_edge:
+                proxy, proxy_t = timed(pipeline.proxy_pixels, filename,
+                                       max_edge)
+                full, full_t = timed(
+                    lambda: pipeline.shrink(cv.imread(filename), max_edge))
+                shape = pipeline.proxy_shape((width, height), max_edge) or \
+                    (width, height)
+                assert proxy.shape[1::-1] == shape, \
+                    '{}x{} at {}: proxy {} but proxy_shape {}'.format(
+                        width, height, max_edge, proxy.shape[1::-1], shape)
+                assert full.shape == proxy.shape
+                print('{:>11} {:>6} {:>11} {:>9.1f} {:>9.1f}'.format(
+                    '{}x{}'.format(width, height), max_edge,
+                    '{}x{}'.format(*shape), proxy_t * 1e3, full_t * 1e3))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
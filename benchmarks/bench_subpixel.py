@@ -0,0 +1,65 @@
+'''
+Sub-pixel line centre benchmark.
+
+Times subpixel_points() on straight lines one to six pixels wide and checks
+that each column along a line gives exactly one centre point, even-width
+lines included.  Only needs the bpy-free pipeline module:
+
+    python benchmarks/bench_subpixel.py --length 4000
+'''
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                os.pardir))
+from image_voodoo import pipeline  # noqa: E402
+
+
+WIDTHS = [1, 2, 3, 4, 5, 6]
+
+# Columns at each end of a line left out of the check, where the line caps
+# bend the ridge
+END = pipeline.RIDGE_HALO
+
+
+# Horizontal white line on black, like a thick cv.Canny edge
+def line_edges(length, width):
+    edges = np.zeros((64, length + 64), dtype=np.uint8)
+    edges[32:32 + width, 32:32 + length] = 255
+    return edges
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument('--length', type=int, default=4000)
+    args = parser.parse_args(argv)
+
+    print('{:>6} {:>8} {:>8} {:>10}'.format('width', 'points', 'centre',
+                                            'ms'))
+    for width in WIDTHS:
+        edges = line_edges(args.length, width)
+        start = time.perf_counter()
+        points = pipeline.subpixel_points(edges)
+        elapsed = time.perf_counter() - start
+
+        columns = np.floor(points[:, 0] + 0.5)
+        inner = (columns >= 32 + END) & (columns < 32 + args.length - END)
+        counts = np.bincount(columns[inner].astype(int) - 32 - END,
+                             minlength=args.length - 2 * END)
+        assert (counts == 1).all(), \
+            'width {}: columns without exactly one point'.format(width)
+        centre = edges.shape[0] - 1 - (32 + (width - 1) / 2)
+        assert np.allclose(points[inner, 1], centre, atol=0.05), \
+            'width {}: centre off the middle of the line'.format(width)
+
+        print('{:>6} {:>8} {:>8.2f} {:>10.2f}'.format(
+            width, len(points), points[inner, 1].mean(), elapsed * 1e3))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,75 @@
+'''
+Tiled edge pass memory benchmark.
+
+Runs tiled_reference() without a cache on a synthetic scan, with the full
+size contour drawing on the way the batch tool asks for it, and checks that
+the traced peak stays near the size of the decoded grayscale image rather
+than growing with the edge map and the drawing.  Only needs the bpy-free
+pipeline module:
+
+    python benchmarks/bench_tiled_memory.py --size 12000 9000
+'''
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import cv2 as cv
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                os.pardir))
+from image_voodoo import pipeline  # noqa: E402
+
+
+# Peak allowed over the decoded grayscale image, in grayscale image sizes.
+# Holding the edge map and the contour drawing as well would be 5.
+LIMIT = 1.5
+
+
+# White sheet with dark outlines, saved as PNG so the decode is exact
+def synthetic_scan(filename, width, height, seed=12345):
+    gen = np.random.default_rng(seed)
+    image = np.full((height, width), 240, dtype=np.uint8)
+    for x, y, size in zip(gen.integers(0, width, 400),
+                          gen.integers(0, height, 400),
+                          gen.integers(20, min(width, height) // 4, 400)):
+        cv.circle(image, (int(x), int(y)), int(size), 20, 3)
+    cv.imwrite(filename, image)
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument('--size', type=int, nargs=2, default=[8000, 6000],
+                        metavar=('WIDTH', 'HEIGHT'))
+    parser.add_argument('--tile-size', type=int, default=1024)
+    args = parser.parse_args(argv)
+    width, height = args.size
+
+    with tempfile.TemporaryDirectory() as folder:
+        filename = os.path.join(folder, 'top.png')
+        synthetic_scan(filename, width, height)
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        edges, _, drawing = pipeline.tiled_reference(
+            filename, 100, 200, tile_size=args.tile_size, contours=True)
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        assert drawing.shape == (height, width, 3)
+        assert edges.any() and drawing.any()
+        ratio = peak / (width * height)
+        print('{}x{} tiles {}: {:.2f} s, peak {:.0f} MB, {:.2f}x the '
+              'grayscale image'.format(width, height, args.tile_size,
+                                       elapsed, peak / 2**20, ratio))
+        assert ratio < LIMIT, 'peak memory grows with the image'
+        del edges, drawing
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
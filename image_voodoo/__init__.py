@@ -0,0 +1,37 @@
+'''
+Copyright (C) 2021 Conjuur
+Created by Matt Myers
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+'''
+
+
+bl_info = {
+    "name": "Conjuur - Image Voodoo",
+    "author": "Matt Myers",
+    "version": (2, 0),
+    "blender": (2, 93, 0),
+    "location": "View3D",
+    "description": "Adds scaled reference images into respective views",
+    "warning": "",
+    "wiki_url": "",
+    "category": "View3D",
+}
+
+# The add-on needs bpy, the image pipeline does not.  Outside Blender only the
+# pipeline and batch modules are usable.
+try:
+    import bpy
+except ImportError:
+    bpy = None
+
+if bpy is not None:
+    from .addon import register, unregister
@@ -0,0 +1,2026 @@
+'''
+Copyright (C) 2021 Conjuur
+Created by Matt Myers
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+'''
+
+
+# Blender side of Image Voodoo: settings, operators and panels.  The image
+# work itself lives in pipeline.
+
+import bpy
+import bmesh
+from subprocess import check_call
+import os
+
+try:
+    import cv2 as cv
+except ImportError:
+    pybin = bpy.app.binary_path_python
+    check_call([pybin,'-m', 'pip', 'install', 'opencv-python'])
+    import cv2 as cv
+
+try:
+    import numpy as np
+except ImportError:
+    pybin = bpy.app.binary_path_python
+    check_call([pybin, '-m', 'pip', 'install', 'numpy'])
+    import numpy as np
+
+try:
+    from PIL import Image
+except ImportError:
+    pybin = bpy.app.binary_path_python
+    check_call([pybin, '-m', 'pip', 'install', 'Pillow'])
+    from PIL import Image
+
+import math
+import csv
+import tempfile
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from bpy_extras.io_utils import ImportHelper, ExportHelper
+from bpy_extras.object_utils import AddObjectHelper, object_data_add
+from bpy.types import (Panel, Operator, PropertyGroup)
+from mathutils import Matrix
+from bpy.props import (StringProperty,
+                       FloatProperty,
+                       PointerProperty,
+                       BoolProperty,
+                       IntProperty,
+                       EnumProperty,
+                       FloatVectorProperty
+                       )
+
+from .pipeline import (contour_polylines,
+                       write_points,
+                       read_point_header,
+                       read_points,
+                       point_file,
+                       detect,
+                       reference_edges,
+                       tiled_reference,
+                       band_points,
+                       stream_points,
+                       PointWriter,
+                       process_reference,
+                       EdgeCache,
+                       Manifest,
+                       pixel_transform,
+                       transform_points,
+                       EdgeIndex,
+                       object_extent,
+                       align_views,
+                       file_digest,
+                       known_digest,
+                       content_digest,
+                       reference_files,
+                       file_view,
+                       image_size,
+                       probe_sizes,
+                       warm_reference,
+                       proxy_shape,
+                       proxy_pixels,
+                       encode_png,
+                       Profile,
+                       stage,
+                       write_profile
+                       )
+
+# Edge Helpers ##########################
+
+
+# Edge maps from the last Canny run, keyed by reference image name, so the
+# point and mesh steps can use them without going back to disk
+edge_maps = {}
+
+# Profile of the last run of each operator, by reference image name and
+# then operator label
+profiles = {}
+
+
+# Start or stop tracing memory to match the panel setting
+def sync_tracing(vprops):
+    if vprops.trace_memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    elif not vprops.trace_memory and tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+
+def update_tracing(self, context):
+    sync_tracing(self)
+
+
+# Empty profile for an operator run, with memory traced if asked for
+def new_profile(vprops):
+    sync_tracing(vprops)
+    return Profile()
+
+
+# Keep a finished run's profile under each reference it worked on
+def keep_profile(names, label, profile):
+    for name in names:
+        profiles.setdefault(name, {})[label] = profile
+
+
+# Reference image empties an edge operator should work on
+def reference_empties(context, targets='ACTIVE'):
+    if targets == 'ALL':
+        objs = context.scene.objects
+    else:
+        objs = context.selected_objects[:1] if targets == 'ACTIVE' else \
+            context.selected_objects
+    return [obj for obj in objs
+            if obj.type == 'EMPTY' and obj.empty_display_type == 'IMAGE'
+            and obj.data is not None]
+
+
+# Folder the point files of the loaded reference set are written to and
+# read from, the set's folder next to the .blend
+def point_dir(vprops):
+    return os.path.join(os.path.dirname(bpy.data.filepath),
+                        vprops.load_directory)
+
+
+# Edge Cache ############################
+
+
+# Edge cache configured by the add-on settings, or None when it is turned off
+def edge_cache(vprops):
+    if not vprops.use_cache:
+        return None
+    if vprops.cache_dir:
+        directory = bpy.path.abspath(vprops.cache_dir)
+    else:
+        directory = os.path.join(tempfile.gettempdir(), 'image-voodoo-cache')
+    return EdgeCache(directory, vprops.cache_size * 2**20)
+
+
+# Manifest ##############################
+
+
+# The scene's record of what was made for each view, kept in the .blend as
+# JSON in a custom property
+def scene_manifest(scene):
+    return Manifest.from_json(scene.get('voodoo_manifest', ''))
+
+
+def keep_manifest(scene, manifest):
+    scene['voodoo_manifest'] = manifest.to_json()
+
+
+# Add a finished stage of a view to the scene's manifest
+def record_stage(scene, name, stage, key, params, artifacts, timings):
+    manifest = scene_manifest(scene)
+    manifest.record(name, stage, key, params, artifacts, timings)
+    keep_manifest(scene, manifest)
+
+
+# Key of the canny stage of a reference, from its source digest and
+# settings
+def canny_key(digest, params):
+    return content_digest(digest, sorted(params.items()))
+
+
+# Mesh Helpers ##########################
+
+
+# Pixel to world transform of a reference empty, for points found on an
+# edge map x_pixels by y_pixels.  The aspect comes from the image the empty
+# shows, read from its header or voodoo_size rather than decoding it.
+def reference_transform(obj, x_pixels, y_pixels):
+    # matrix_world lags behind location and rotation set by a script until
+    # the view layer is updated
+    bpy.context.view_layer.update()
+    image_size = None
+    if obj.data is not None:
+        image_size = pixel_size(obj.data)
+        if min(image_size) == 0:
+            image_size = None
+    return pixel_transform(np.array(obj.matrix_world),
+                           obj.empty_display_size, (x_pixels, y_pixels),
+                           image_size, tuple(obj.empty_image_offset))
+
+
+# Replace a mesh's geometry in bulk with a float32 (N, 3) vertex array.
+# Passing (M, 2) vertex index pairs as edges makes a polyline mesh.
+def fill_mesh(mesh, verts, edges=None):
+    verts = np.ascontiguousarray(verts, dtype=np.float32)
+    mesh.clear_geometry()
+    mesh.vertices.add(len(verts))
+    mesh.vertices.foreach_set("co", verts.ravel())
+    if edges is not None:
+        mesh.edges.add(len(edges))
+        mesh.edges.foreach_set("vertices", np.ascontiguousarray(
+            edges, dtype=np.int32).ravel())
+    mesh.update()
+    return mesh
+
+
+# New mesh datablock filled by fill_mesh
+def edge_mesh(name, verts, edges=None):
+    return fill_mesh(bpy.data.meshes.new(name=name), verts, edges)
+
+
+# Where a reference empty shows its image, as plain values for hashing
+def placement_key(obj):
+    bpy.context.view_layer.update()
+    return ([tuple(row) for row in obj.matrix_world],
+            obj.empty_display_size, tuple(obj.empty_image_offset),
+            pixel_size(obj.data) if obj.data is not None else None)
+
+
+# The edge mesh (kind 'points' or 'contours') an earlier import made for a
+# reference, or None
+def existing_mesh(ob, kind):
+    for obj in bpy.context.scene.objects:
+        if obj.type == 'MESH' and obj.get('voodoo_reference') == ob and \
+                obj.get('voodoo_kind') == kind:
+            return obj
+    return None
+
+
+# Digest of the inputs the reference's edge mesh was built from when
+# updating is on, or None
+def mesh_digest(vprops, ob, kind):
+    obj = existing_mesh(ob, kind) if vprops.update_meshes else None
+    return None if obj is None else obj.get('voodoo_digest')
+
+
+# Digest of a mesh's inputs, a source file or edge map and plain values.
+# Hashing a large source would hold up the interface, so with compute False
+# only a file already hashed this session counts and None comes back
+# otherwise, leaving the hashing to the worker.
+def input_digest(source, *parts, compute=True):
+    if isinstance(source, str):
+        source = file_digest(source) if compute else known_digest(source)
+    elif not compute:
+        source = None
+    return None if source is None else content_digest(source, *parts)
+
+
+# Finish on the worker a job digest prepare left undone.  True when the
+# existing mesh was built from the same inputs, so the import can stop.
+def hashed_is_current(job, source):
+    if job['digest'] is not None:
+        return False
+    with stage(job['timings'], 'hash'):
+        job['digest'] = input_digest(source, *job['parts'])
+    return job['digest'] == job['current']
+
+
+# Put world space verts into the scene as the reference's edge mesh.  With
+# updating on an existing mesh for the view is refilled in place instead of
+# adding another object, so tuning thresholds leaves no orphan meshes.  The
+# object stays at the world origin so the mesh lines up with its reference
+# wherever the 3D cursor is.  digest records the inputs for mesh_digest.
+def canny_mesh(context, verts, ob, operator=None, edges=None, digest=None):
+    kind = 'points' if edges is None else 'contours'
+    vprops = context.scene.voodooprops
+    obj = existing_mesh(ob, kind) if vprops.update_meshes else None
+    if obj is not None:
+        fill_mesh(obj.data, verts, edges)
+    elif edges is None:
+        mesh = edge_mesh(ob.capitalize() + " Mesh", verts)
+        obj = object_data_add(context, mesh, operator=operator)
+    else:
+        mesh = edge_mesh(ob.capitalize() + " Contours", verts, edges)
+        obj = object_data_add(context, mesh, operator=operator)
+    obj.matrix_world = Matrix()
+    obj['voodoo_reference'] = ob
+    obj['voodoo_kind'] = kind
+    if digest is not None:
+        obj['voodoo_digest'] = digest
+
+    return obj
+
+
+# Write a uint8 gray or BGR array into a blender image, creating or resizing
+# it as needed.  Blender keeps pixels as bottom-up float RGBA.
+def image_from_array(name, array):
+    height, width = array.shape[:2]
+    image = bpy.data.images.get(name)
+    if image is None:
+        image = bpy.data.images.new(name, width, height)
+    elif tuple(image.size) != (width, height):
+        image.scale(width, height)
+
+    rgba = np.empty((height, width, 4), dtype=np.float32)
+    if array.ndim == 2:
+        rgba[..., :3] = array[::-1, :, None]
+    else:
+        rgba[..., :3] = array[::-1, :, 2::-1]
+    rgba[..., :3] *= 1 / 255
+    rgba[..., 3] = 1
+    image.pixels.foreach_set(rgba.ravel())
+    image.update()
+    return image
+
+
+# Pack an encoded image file straight from memory into the named image,
+# creating it if needed.  Only this image is packed and nothing is written
+# to disk; Blender decodes the packed file when the pixels are first used.
+def packed_image(name, data, extension='.png'):
+    image = bpy.data.images.get(name)
+    if image is None:
+        image = bpy.data.images.new(name, 1, 1)
+    image.source = 'FILE'
+    image.filepath_raw = '//' + name + extension
+    image.pack(data=data, data_len=len(data))
+    image.buffers_free()
+    image.use_fake_user = True
+    return image
+
+
+# Edge Snapping #########################
+
+
+# Nearest edge indexes by edge mesh object name, with the inputs they were
+# built from
+edge_indexes = {}
+
+
+# EdgeIndex over the edge mesh of reference ob, with the segments of a
+# contour mesh, in the plane of its empty.  Built on first use and kept
+# until the mesh is re-imported or either object moves.  None when the
+# reference has no edge mesh yet.
+def reference_index(ob):
+    view = bpy.context.scene.objects.get(ob)
+    obj = existing_mesh(ob, 'points') or existing_mesh(ob, 'contours')
+    if view is None or obj is None or len(obj.data.vertices) == 0:
+        return None
+    key = (obj.get('voodoo_digest'), len(obj.data.vertices),
+           placement_key(view), [tuple(row) for row in obj.matrix_world])
+    cached = edge_indexes.get(obj.name)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+
+    co = np.empty(len(obj.data.vertices) * 3, dtype=np.float32)
+    obj.data.vertices.foreach_get("co", co)
+    matrix = np.array(obj.matrix_world)
+    verts = co.reshape(-1, 3) @ matrix[:3, :3].T + matrix[:3, 3]
+    # A contour mesh snaps along its segments, not just to their corners
+    pairs = np.empty(len(obj.data.edges) * 2, dtype=np.int32)
+    obj.data.edges.foreach_get("vertices", pairs)
+    index = EdgeIndex(verts, np.array(view.matrix_world),
+                      pairs.reshape(-1, 2))
+    edge_indexes[obj.name] = (key, index)
+    return index
+
+
+# Measurement ###########################
+
+
+# The final dimensions a view's image x and y axes show
+VIEW_DIMS = {'top': ('length', 'width'),
+             'bottom': ('length', 'width'),
+             'front': ('length', 'height'),
+             'back': ('length', 'height'),
+             'right': ('width', 'height'),
+             'left': ('width', 'height')}
+
+
+# World size along the image x and y, and world centre, of the object
+# Measure Extents found on a reference empty, at the empty's current
+# placement and scale, or None before it was measured
+def measured_box(obj):
+    extent = obj.get('voodoo_extent')
+    if extent is None:
+        return None
+    x, y, width, height, x_pixels, y_pixels = extent
+    transform = reference_transform(obj, x_pixels, y_pixels)
+    size = (width * np.linalg.norm(transform[:, 0]),
+            height * np.linalg.norm(transform[:, 1]))
+    # Point pixels count rows up from the bottom
+    centre = transform @ (x + (width - 1) / 2,
+                          y_pixels - 1 - y - (height - 1) / 2, 1)
+    return size, centre
+
+
+# Put a measured view's object size into the screen measured dimensions
+# its axes show.  False when there is nothing to fill in.
+def fill_measured(vprops, obj):
+    dims = VIEW_DIMS.get(file_view(obj.name))
+    box = measured_box(obj)
+    if dims is None or box is None:
+        return False
+    for dim, value in zip(dims, box[0]):
+        setattr(vprops, 'meas_' + dim + '_dim', value)
+    return True
+
+
+# Reference Import ######################
+
+
+# Rotation of each view's reference empty.  These are the orientations
+# load_reference_image gave the old set_view matrices, with the half turns
+# back and left views got afterwards.
+VIEW_ROTATIONS = {'top': (0, 0, 0),
+                  'front': (math.pi/2, 0, 0),
+                  'right': (math.pi/2, 0, math.pi/2),
+                  'bottom': (math.pi, 0, 0),
+                  'back': (-math.pi/2, math.pi, 0),
+                  'left': (-math.pi/2, -math.pi, math.pi/2)}
+
+# Worker pool decoding freshly imported references and proxies, and the
+# pending reference decodes by file path so importing the same folder twice
+# does not queue them again
+decode_pool = None
+decode_jobs = {}
+
+
+def decode_executor():
+    global decode_pool
+    if decode_pool is None:
+        decode_pool = ThreadPoolExecutor()
+    return decode_pool
+
+
+# Queue the grayscale decode of each reference into the edge cache.  Returns
+# False when there is no cache to decode into.
+def decode_references(paths, cache):
+    if cache is None:
+        return False
+    for path in paths:
+        if path not in decode_jobs or decode_jobs[path].done():
+            decode_jobs[path] = decode_executor().submit(warm_reference,
+                                                         path, cache)
+    return True
+
+
+# Proxies ###############################
+
+
+# A reference shown through a display proxy keeps the proxy on its empty.
+# The proxy remembers the source file, the full resolution image and its
+# pixel size, so anything needing exact pixels goes back to the original.
+def reference_path(obj):
+    return obj.data.get('voodoo_source') or obj.data.filepath_from_user()
+
+
+# Pixel size of the full resolution image behind a reference, proxy or edge
+# result, read from the file header rather than decoding when possible
+def pixel_size(image):
+    if 'voodoo_size' in image:
+        return tuple(image['voodoo_size'])
+    if image.source == 'FILE' and not image.has_data and \
+            image.packed_file is None:
+        return image_size(image.filepath_from_user())
+    return tuple(image.size)
+
+
+# Proxy decodes still running, by proxy image name
+proxy_jobs = {}
+
+
+# Show a reference through a proxy no longer than max_edge on either side.
+# The proxy is created blank at its final size straight away and its pixels
+# are decoded on the worker pool.
+def make_proxy(obj, max_edge):
+    full = bpy.data.images.get(obj.data.get('voodoo_full', obj.data.name))
+    proxy = bpy.data.images.get(full.get('voodoo_proxy', ''))
+    if proxy is not None:
+        if proxy['voodoo_edge'] == max_edge:
+            obj.data = proxy
+            return
+        obj.data = full
+        proxy_jobs.pop(proxy.name, None)
+        bpy.data.images.remove(proxy)
+
+    path = full.filepath_from_user()
+    size = pixel_size(full)
+    shape = proxy_shape(size, max_edge)
+    if shape is None:
+        return
+    proxy = bpy.data.images.new(full.name + '-proxy', *shape)
+    proxy['voodoo_source'] = path
+    proxy['voodoo_full'] = full.name
+    proxy['voodoo_size'] = size
+    proxy['voodoo_edge'] = max_edge
+    proxy.use_fake_user = True
+    full['voodoo_proxy'] = proxy.name
+    full['voodoo_size'] = size
+    full.use_fake_user = True
+    obj.data = proxy
+
+    proxy_jobs[proxy.name] = decode_executor().submit(
+        lambda: encode_png(proxy_pixels(path, max_edge, size)))
+    if not bpy.app.timers.is_registered(fill_proxies):
+        bpy.app.timers.register(fill_proxies, first_interval=0.1)
+
+
+# Put the full resolution image back on a proxied reference
+def show_full(obj):
+    full = bpy.data.images.get(obj.data.get('voodoo_full', ''))
+    if full is not None:
+        obj.data = full
+
+
+# Timer packing finished proxy decodes into their images, which keeps the
+# small proxy in the .blend while the full image stays on disk
+def fill_proxies():
+    for name, future in list(proxy_jobs.items()):
+        if not future.done():
+            continue
+        del proxy_jobs[name]
+        if name in bpy.data.images and future.exception() is None:
+            packed_image(name, future.result())
+    return 0.1 if proxy_jobs else None
+
+
+def update_proxies(self, context):
+    for obj in reference_empties(context, 'ALL'):
+        if self.use_proxies:
+            make_proxy(obj, self.proxy_size)
+        else:
+            show_full(obj)
+
+
+# Live Preview ##########################
+
+
+# Downscaled grayscale levels of each reference image, built once per image
+# and reused for every preview
+pyramids = {}
+
+# Time the last preview took, shown in the edge panel
+preview_stats = {'ms': 0.0}
+
+
+def image_pyramid(filepath, min_width=256):
+    if filepath not in pyramids:
+        levels = [cv.imread(filepath, cv.IMREAD_GRAYSCALE)]
+        while levels[-1].shape[1] > min_width:
+            levels.append(cv.pyrDown(levels[-1]))
+        # The full size level is never previewed, don't hold on to it
+        pyramids[filepath] = levels[1:] or levels
+    return pyramids[filepath]
+
+
+# Recompute edges on a small pyramid level of the selected reference whenever
+# a threshold changes, and show them in the '-preview' image
+def update_preview(self, context):
+    if not self.live_preview:
+        return
+    refs = reference_empties(context, 'ACTIVE')
+    if refs == []:
+        return
+    obj = refs[0]
+
+    start = time.perf_counter()
+    levels = image_pyramid(reference_path(obj))
+    small = [level for level in levels if level.shape[1] <= self.preview_size]
+    level = small[0] if small else levels[-1]
+    edges = detect(level, self.edge_detector, self.canny_filter1,
+                   self.canny_filter2)
+    preview = image_from_array(obj.name + '-preview', edges)
+    preview_stats['ms'] = (time.perf_counter() - start) * 1000
+
+    # Show it in any open image editor
+    if context.screen is not None:
+        for area in context.screen.areas:
+            if area.type == 'IMAGE_EDITOR':
+                area.spaces.active.image = preview
+            area.tag_redraw()
+
+
+# Global Inputs #########################
+
+
+class VoodooInputs(PropertyGroup):
+    load_directory: StringProperty(
+        name="", description="Directory where images are stored.",
+        default="Please pick directory below", maxlen=1024)
+
+    length_dim: FloatProperty(
+        name="Length", description="", default=1.0, min=0.01, max=1000.0)
+
+    width_dim: FloatProperty(
+        name="Width", description="", default=1.0, min=0.01, max=1000.0)
+
+    height_dim: FloatProperty(
+        name="Height", description="", default=1.0, min=0.01, max=1000.0)
+
+    meas_length_dim: FloatProperty(
+        name="Length", description="", default=1.0, min=0.01, max=1000.0)
+
+    meas_width_dim: FloatProperty(
+        name="Width", description="", default=1.0, min=0.01, max=1000.0)
+
+    meas_height_dim: FloatProperty(
+        name="Height", description="", default=1.0, min=0.01, max=1000.0)
+
+    image_alpha: FloatProperty(
+        name="Transparency", description="", default=1.0, min=0.0, max=1.0)
+
+    measure_method: EnumProperty(
+        name="Measure", description="How Measure Extents finds the object "
+                                    "in each view's edges",
+        items=(('CONTOUR', "Largest Contour",
+                "Bounding box of the largest contour, passing over a "
+                "frame around the image"),
+               ('PERCENTILE', "Percentile Box",
+                "Box holding the edge pixels left after trimming a "
+                "percentage off each side, ignoring specks and margin "
+                "text")),
+        default='CONTOUR')
+
+    measure_trim: FloatProperty(
+        name="Trim %",
+        description="Percentage of edge pixels the percentile box leaves "
+                    "out at each side",
+        default=1.0, min=0.0, max=25.0)
+
+    align_to_dims: BoolProperty(
+        name="Use Final Dimensions",
+        description="Align Views also sizes the object to the final scaled "
+                    "dimensions, otherwise the views keep their average "
+                    "scale",
+        default=False)
+
+    align_to_origin: BoolProperty(
+        name="Centre on Origin",
+        description="Align Views centres the object on the world origin, "
+                    "otherwise where the views agree on average",
+        default=True)
+
+    canny_filter1: IntProperty(
+        name="Canny Edge Filter 1", description="Canny Edge Filter 1",
+        default=30, min=1, max=500, update=update_preview)
+
+    canny_filter2: IntProperty(
+        name="Canny Edge Filter 2", description="Canny Edge Filter 2",
+        default=200, min=1, max=500, update=update_preview)
+
+    edge_detector: EnumProperty(
+        name="Detector", description="How edges are found in the references",
+        items=(('BILATERAL', "Bilateral + Canny",
+                "Edge preserving smoothing before Canny, slowest"),
+               ('GAUSSIAN', "Gaussian + Canny",
+                "Plain smoothing before Canny"),
+               ('CANNY', "Canny", "Canny on the unfiltered image"),
+               ('AUTO', "Auto Canny",
+                "Gaussian + Canny with thresholds set from the median "
+                "brightness, the sliders are ignored"),
+               ('ADAPTIVE', "Adaptive Threshold",
+                "Dark strokes against their surroundings, fastest for line "
+                "drawings and scans"),
+               ('SOBEL', "Sobel",
+                "Gradient magnitude above Canny Edge Filter 1")),
+        default='BILATERAL', update=update_preview)
+
+    live_preview: BoolProperty(
+        name="Live Preview",
+        description="Redo edges on a downscaled copy of the selected image "
+                    "whenever a filter value changes",
+        default=False, update=update_preview)
+
+    preview_size: IntProperty(
+        name="Preview Width",
+        description="Largest pixel width used for the live preview",
+        default=1024, min=128, max=8192, update=update_preview)
+
+    use_proxies: BoolProperty(
+        name="Display Proxies",
+        description="Show reference and edge images through downscaled "
+                    "copies, edge work still reads the full size files",
+        default=False, update=update_proxies)
+
+    proxy_size: IntProperty(
+        name="Proxy Size",
+        description="Longest side in pixels of the display proxies",
+        default=2048, min=256, max=16384, update=update_proxies)
+
+    use_tiles: BoolProperty(
+        name="Tiled Edges",
+        description="Work through large scans in overlapping tiles so "
+                    "memory use depends on the tile size, not the image. "
+                    "Edge and contour images are shown at proxy size",
+        default=False)
+
+    tile_size: IntProperty(
+        name="Tile Size",
+        description="Side in pixels of the tiles edges are worked out in",
+        default=2048, min=256, max=16384)
+
+    trace_memory: BoolProperty(
+        name="Trace Memory",
+        description="Record the peak memory of each stage along with its "
+                    "time, for stages that did not overlap another. Slows "
+                    "Python code down while on",
+        default=False, update=update_tracing)
+
+    use_contours: BoolProperty(
+        name="Contour Image",
+        description="Also make the colored contour image. Turn off when "
+                    "only the edges are needed",
+        default=True)
+
+    use_cache: BoolProperty(
+        name="Cache Edge Results",
+        description="Keep grayscale, filtered and edge images on disk so "
+                    "revisiting a filter setting is instant",
+        default=True)
+
+    cache_size: IntProperty(
+        name="Cache Size (MB)",
+        description="Least recently used results are removed past this size",
+        default=2048, min=64, max=65536)
+
+    cache_dir: StringProperty(
+        name="Cache Directory",
+        description="Where cached edge results are kept, blank for the "
+                    "system temp directory",
+        default="", maxlen=1024, subtype='DIR_PATH')
+
+    edge_targets: EnumProperty(
+        name="Process", description="Reference images to run edges on",
+        items=(('ACTIVE', "First Selected",
+                "Only the first selected reference image"),
+               ('SELECTED', "Selected", "Every selected reference image"),
+               ('ALL', "All", "Every reference image in the scene")),
+        default='ACTIVE')
+
+    point_format: EnumProperty(
+        name="Point File", description="File format for edge points",
+        items=(('BINARY', "Binary (.bin)",
+                "Compact binary point file that loads memory-mapped"),
+               ('CSV', "CSV Text (.txt)",
+                "Plain text x, y, z rows, as older versions wrote")),
+        default='BINARY')
+
+    subpixel_points: BoolProperty(
+        name="Sub-pixel Points",
+        description="One point per pixel along the centre of each edge "
+                    "line, fitted to sub-pixel precision, instead of every "
+                    "edge pixel. Thick or soft lines give far fewer points",
+        default=False)
+
+    contour_epsilon: FloatProperty(
+        name="Simplify",
+        description="Douglas-Peucker tolerance in pixels for imported "
+                    "contours, 0 keeps every contour point",
+        default=1.0, min=0.0, max=50.0)
+
+    export_edges: BoolProperty(
+        name="Export Edge Files",
+        description="Also write the canny image and point file to disk "
+                    "when running Edges to Mesh",
+        default=False)
+
+    skip_current: BoolProperty(
+        name="Skip Up-to-date Views",
+        description="Canny Edges and Create Point File leave views alone "
+                    "when the file's manifest shows their results were made "
+                    "from the same source and settings",
+        default=True)
+
+    update_meshes: BoolProperty(
+        name="Update Existing Meshes",
+        description="Rewrite a view's edge mesh in place on re-import "
+                    "instead of adding a new one, and skip the import when "
+                    "nothing it depends on has changed",
+        default=True)
+
+    snap_view: StringProperty(
+        name="View",
+        description="Reference image whose edge mesh selected vertices "
+                    "snap to",
+        default="")
+
+    snap_distance: FloatProperty(
+        name="Max Distance",
+        description="Vertices farther than this from every edge stay "
+                    "where they are, 0 snaps them however far",
+        default=0.0, min=0.0)
+
+
+# Operators ################################
+
+
+# Runs an operator's heavy work on a background thread while a timer keeps
+# the UI responsive.  Operators split their work into prepare (main thread,
+# reads blender data), run (worker thread, NumPy/OpenCV only) and finish
+# (main thread, writes the results into the scene).  ESC cancels, and
+# nothing is written to the scene for a cancelled job.
+class BackgroundJob:
+
+    def prepare(self, context):
+        return {}
+
+    def run(self, job, progress, cancelled):
+        return None
+
+    def finish(self, context, job, result):
+        return
+
+    # Scripts calling the operator directly get the same work synchronously
+    def execute(self, context):
+        job = self.prepare(context)
+        if job is None:
+            return{'CANCELLED'}
+        result = self.run(job, lambda fraction: None, threading.Event())
+        self.finish(context, job, result)
+        return{'FINISHED'}
+
+    def invoke(self, context, event):
+        job = self.prepare(context)
+        if job is None:
+            return{'CANCELLED'}
+
+        self._job = job
+        self._progress = [0.0]
+        self._cancelled = threading.Event()
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._future = self._executor.submit(
+            self.run, job, self._set_progress, self._cancelled)
+
+        wm = context.window_manager
+        self._timer = wm.event_timer_add(0.1, window=context.window)
+        wm.progress_begin(0, 100)
+        wm.modal_handler_add(self)
+        return{'RUNNING_MODAL'}
+
+    def modal(self, context, event):
+        if event.type == 'ESC':
+            self._cancelled.set()
+            self._end(context)
+            self.report({'INFO'}, self.bl_label + " cancelled")
+            return{'CANCELLED'}
+
+        if event.type != 'TIMER':
+            return{'PASS_THROUGH'}
+
+        context.window_manager.progress_update(int(self._progress[0] * 100))
+        if not self._future.done():
+            return{'PASS_THROUGH'}
+
+        self._end(context)
+        self.finish(context, self._job, self._future.result())
+        return{'FINISHED'}
+
+    def _set_progress(self, fraction):
+        self._progress[0] = fraction
+
+    def _end(self, context):
+        wm = context.window_manager
+        wm.event_timer_remove(self._timer)
+        wm.progress_end()
+        self._executor.shutdown(wait=False)
+
+
+class CannyEdges(BackgroundJob, Operator):
+    bl_idname = "op.canny_edges"
+    bl_label = "Canny Edge and Contour Generator"
+
+    def prepare(self, context):
+        scene = context.scene
+        vprops = scene.voodooprops
+
+        # Check to make sure an object is selected
+        refs = reference_empties(context, vprops.edge_targets)
+        if refs == []:
+            print("No object selected.")
+            return None
+
+        # Views the manifest shows were made from the same source and
+        # settings, with their images still in the file, are left alone
+        params = {'detector': vprops.edge_detector,
+                  'filter1': vprops.canny_filter1,
+                  'filter2': vprops.canny_filter2,
+                  'tile_size': vprops.tile_size if vprops.use_tiles else 0,
+                  'proxy_size': vprops.proxy_size
+                  if vprops.use_proxies or vprops.use_tiles else 0,
+                  'contours': vprops.use_contours}
+        # Sources not hashed yet get their key on the worker, and are only
+        # skipped there if it matches the one on record
+        manifest = scene_manifest(scene)
+        keys = []
+        for obj in refs:
+            digest = manifest.source_digest(obj.name, reference_path(obj),
+                                            compute=False)
+            keys.append(None if digest is None else canny_key(digest, params))
+        recorded = [None] * len(refs)
+        if vprops.skip_current:
+            def current(obj, key):
+                return manifest.is_current(
+                    obj.name, 'canny', key,
+                    exists=lambda name: name in bpy.data.images)
+            recorded = [manifest.key(obj.name, 'canny') for obj in refs]
+            recorded = [key if key is not None and current(obj, key)
+                        else None for obj, key in zip(refs, recorded)]
+            stale = [key is None or key != known
+                     for key, known in zip(keys, recorded)]
+            refs = [obj for obj, redo in zip(refs, stale) if redo]
+            keys = [key for key, redo in zip(keys, stale) if redo]
+            recorded = [key for key, redo in zip(recorded, stale) if redo]
+        if refs == []:
+            self.report({'INFO'}, "Edges are up to date")
+            return None
+
+        # Only the file paths are read from blender before the work starts
+        return {'names': [obj.name for obj in refs],
+                'paths': [reference_path(obj) for obj in refs],
+                'keys': keys, 'recorded': recorded, 'params': params,
+                'filter1': vprops.canny_filter1,
+                'filter2': vprops.canny_filter2,
+                'cache': edge_cache(vprops),
+                'detector': vprops.edge_detector,
+                'contours': vprops.use_contours,
+                'profiles': [new_profile(vprops) for obj in refs],
+                'tile_size': vprops.tile_size if vprops.use_tiles else None,
+                'proxy_size': vprops.proxy_size
+                if vprops.use_proxies or vprops.use_tiles else None}
+
+    # Canny Edge and contours for every reference on a worker pool, along
+    # with the PNG files of both that go into the .blend (None for the
+    # contours when they are turned off) and the stage key.  None for a
+    # view that turned out to be current once its source was hashed.
+    def run(self, job, progress, cancelled):
+        def edge_job(path, timings, key, recorded):
+            if key is None:
+                with stage(timings, 'hash'):
+                    key = canny_key(file_digest(path), job['params'])
+                if key == recorded:
+                    return None
+            if job['tile_size'] is not None:
+                edges, shown_edges, drawing = tiled_reference(
+                    path, job['filter1'], job['filter2'], job['cache'],
+                    job['detector'], job['tile_size'],
+                    display_edge=job['proxy_size'],
+                    contours=job['contours'], timings=timings)
+                pics, max_edge = (shown_edges, drawing), None
+            else:
+                edges, drawing = process_reference(
+                    path, job['filter1'], job['filter2'], job['cache'],
+                    job['detector'], timings, job['contours'])
+                pics, max_edge = (edges, drawing), job['proxy_size']
+            with stage(timings, 'encode'):
+                encoded = [None if pic is None else encode_png(pic, max_edge)
+                           for pic in pics]
+            return edges, encoded, key
+
+        results = []
+        with ThreadPoolExecutor(max_workers=os.cpu_count()) as pool:
+            futures = [pool.submit(edge_job, *view) for view in zip(
+                job['paths'], job['profiles'], job['keys'], job['recorded'])]
+            for future in futures:
+                if cancelled.is_set():
+                    for pending in futures:
+                        pending.cancel()
+                    return None
+                results.append(future.result())
+                progress(len(results) / len(futures))
+        return results
+
+    def finish(self, context, job, result):
+        # Delete existing canny and Contours of the views that were redone
+        im_names = [name + suffix
+                    for name, view in zip(job['names'], result)
+                    if view is not None
+                    for suffix in ('-canny', '-contours')]
+        for pics in bpy.data.images:
+            if pics.name in im_names:
+                bpy.data.images.remove(pics)
+
+        # Internalize Edge and Contour Images, packing only these
+        manifest = scene_manifest(context.scene)
+        for name, path, timings, view in zip(
+                job['names'], job['paths'], job['profiles'], result):
+            # Hashed on the worker, so this only notes the source's stamp
+            manifest.source_digest(name, path)
+            if view is None:
+                continue
+            edges, encoded, key = view
+            edge_maps[name] = edges
+            full_size = edges.shape[1], edges.shape[0]
+            # With proxies on only a downscaled copy goes in the .blend
+            proxied = job['proxy_size'] is not None and \
+                proxy_shape(full_size, job['proxy_size']) is not None
+            for suffix, data in zip(('-canny', '-contours'), encoded):
+                if data is None:
+                    continue
+                with stage(timings, 'pack'):
+                    image = packed_image(name + suffix, data)
+                if proxied:
+                    image['voodoo_size'] = full_size
+                    image['voodoo_source'] = path
+                    image['voodoo_filters'] = (job['filter1'],
+                                               job['filter2'])
+                    image['voodoo_detector'] = job['detector']
+            keep_profile([name], self.bl_label, timings)
+            manifest.record(name, 'canny', key, job['params'],
+                            [name + suffix for suffix, data in zip(
+                                ('-canny', '-contours'), encoded)
+                             if data is not None], timings)
+        keep_manifest(context.scene, manifest)
+        if all(view is None for view in result):
+            self.report({'INFO'}, "Edges are up to date")
+
+
+class ImagetoCSV(BackgroundJob, Operator):
+    bl_idname = "op.im_createcsv"
+    bl_label = "Create Point File"
+
+    def prepare(self, context):
+        scene = context.scene
+        vprops = scene.voodooprops
+
+        # Store path
+        store_dir = point_dir(vprops)
+        print("image will be stored here {}".format(store_dir))
+
+        # find the corresponding canny image to the selected view
+        ob = bpy.context.selected_objects[0]
+        filename = point_file(store_dir, ob.name, vprops.point_format)
+
+        # The point file is current while its canny stage and settings are
+        params = {'file': filename, 'format': vprops.point_format,
+                  'subpixel': vprops.subpixel_points}
+        manifest = scene_manifest(scene)
+        edges_key = manifest.key(ob.name, 'canny')
+        key = content_digest(edges_key, sorted(params.items()))
+        if vprops.skip_current and edges_key is not None and \
+                manifest.is_current(ob.name, 'points', key):
+            self.report({'INFO'}, ob.name + " point file is up to date")
+            return None
+
+        job = {'name': ob.name, 'key': key, 'params': params,
+               'filename': filename,
+               'edges': edge_maps.get(ob.name), 'temp': None,
+               'exact': None, 'cache': edge_cache(vprops),
+               'tile_size': vprops.tile_size if vprops.use_tiles else None,
+               'subpixel': vprops.subpixel_points,
+               'timings': new_profile(vprops)}
+
+        # Use the edge map kept in memory by the last Canny run, otherwise
+        # temporarily save out the canny file and remove it afterward
+        if job['edges'] is None:
+            for im in bpy.data.images:
+                if im.name == ob.name + '-canny':
+                    image_for_pts = im
+            if 'voodoo_filters' in image_for_pts:
+                # Only a display proxy, the edges are redone at full size
+                job['exact'] = (image_for_pts['voodoo_source'],
+                                *image_for_pts['voodoo_filters'],
+                                image_for_pts['voodoo_detector'])
+            else:
+                job['temp'] = os.path.join(store_dir, 'temp-canny.jpg')
+                with stage(job['timings'], 'save render'):
+                    image_for_pts.save_render(job['temp'])
+
+        return job
+
+    def run(self, job, progress, cancelled):
+        if job['exact'] is not None:
+            path, filter1, filter2, detector = job['exact']
+            if job['tile_size'] is not None:
+                # Points go out tile by tile as the edges are found
+                with PointWriter(job['filename'],
+                                 subpixel=job['subpixel']) as writer:
+                    tiled_reference(path, filter1, filter2, job['cache'],
+                                    detector, job['tile_size'],
+                                    writer=writer, timings=job['timings'],
+                                    subpixel=job['subpixel'])
+                return
+            job['edges'] = reference_edges(path, filter1, filter2,
+                                           job['cache'], detector,
+                                           job['timings'])
+        elif job['temp'] is not None:
+            with stage(job['timings'], 'read'):
+                canny_image = Image.open(job['temp'], 'r')
+                job['edges'] = np.asarray(canny_image)
+                canny_image.close()
+
+            # Remove temp canny file
+            os.remove(job['temp'])
+
+        progress(0.5)
+        if cancelled.is_set():
+            return None
+
+        # Binary or CSV by the file name, written a band of rows at a time
+        stream_points(job['filename'], job['edges'],
+                      timings=job['timings'], subpixel=job['subpixel'])
+
+    def finish(self, context, job, result):
+        keep_profile([job['name']], self.bl_label, job['timings'])
+        record_stage(context.scene, job['name'], 'points', job['key'],
+                     job['params'], [job['filename']], job['timings'])
+
+
+class ImportPixels(BackgroundJob, Operator):
+    bl_idname = "op.im_importcsv"
+    bl_label = "Import Edge Pixels"
+
+    # generic transform props   ----> without this I was getting the mesh
+    # to build but getting a location error
+    align_items = (
+            ('WORLD', "World", "Align the new object to the world"),
+            ('VIEW', "View", "Align the new object to the view"),
+            ('CURSOR', "3D Cursor", "Use the 3D cursor orientation for the new object")
+    )
+    align: EnumProperty(
+            name="Align",
+            items=align_items,
+            default='WORLD',
+            update=AddObjectHelper.align_update_callback,
+            )
+    location: FloatVectorProperty(
+        name="Location",
+        subtype='TRANSLATION',
+    )
+    rotation: FloatVectorProperty(
+        name="Rotation",
+        subtype='EULER',
+    )
+
+    def prepare(self, context):
+        scene = context.scene
+        vprops = scene.voodooprops
+
+        try:
+            # only do one image at a time
+            my_im = bpy.context.selected_objects[0]
+            ob = bpy.context.selected_objects[0].name
+
+            # Prefer the newest of the binary and legacy CSV point files
+            store_dir = point_dir(vprops)
+            candidates = [point_file(store_dir, ob, point_format)
+                          for point_format in ('BINARY', 'CSV')]
+            candidates = [name for name in candidates
+                          if os.path.exists(name)]
+            if candidates == []:
+                print("The point file hasn't been created yet.")
+                return None
+            full_name = max(candidates, key=os.path.getmtime)
+
+            # Binary files know their size, CSV ones go by the canny image
+            if full_name.endswith('.bin'):
+                x_pixels, y_pixels = read_point_header(full_name)[1:3]
+            else:
+                x_pixels, y_pixels = pixel_size(bpy.data.images[ob +
+                                                                '-canny'])
+
+        except:
+            print("No object selected.")
+            return None
+
+        if my_im.type != 'EMPTY':
+            print("Selected an invalid object.")
+            return None
+
+        # Same point file and same placement means the mesh is current
+        parts = (placement_key(my_im),)
+        current = mesh_digest(vprops, ob, 'points')
+        digest = input_digest(full_name, *parts, compute=False)
+        if digest is not None and digest == current:
+            self.report({'INFO'}, ob + " edge mesh is already up to date")
+            return None
+
+        return {'name': ob, 'filename': full_name,
+                'transform': reference_transform(my_im, x_pixels, y_pixels),
+                'digest': digest, 'parts': parts, 'current': current,
+                'timings': new_profile(vprops)}
+
+    def run(self, job, progress, cancelled):
+        if hashed_is_current(job, job['filename']):
+            return None
+        with stage(job['timings'], 'parse'):
+            if job['filename'].endswith('.bin'):
+                v = read_points(job['filename'])
+            else:
+                v = self.open_csv(job['filename'], cancelled)
+        if v is None:
+            return None
+        progress(0.8)
+
+        # Every point goes from pixels to world space in one product
+        with stage(job['timings'], 'transform'):
+            return transform_points(job['transform'], v)
+
+    # Open legacy csv point file related to selected view and append verts
+    def open_csv(self, filename, cancelled):
+        v = []
+        with open(filename) as csv_file:
+            csv_reader = csv.reader(csv_file, delimiter=',')
+            for row in csv_reader:
+                x_coord = float(row[0])
+                y_coord = float(row[1])
+                z_coord = float(row[2])
+                v.append((x_coord, y_coord, z_coord))
+                if len(v) % 100000 == 0 and cancelled.is_set():
+                    return None
+        return v
+
+    def finish(self, context, job, result):
+        ob = job['name']
+        if result is None:
+            self.report({'INFO'}, ob + " edge mesh is already up to date")
+            return
+
+        # create mesh
+        with stage(job['timings'], 'mesh'):
+            obj = canny_mesh(context, result, ob, operator=self,
+                             digest=job['digest'])
+        keep_profile([ob], self.bl_label, job['timings'])
+        record_stage(context.scene, ob, 'mesh', job['digest'],
+                     {'file': job['filename']}, [obj.name], job['timings'])
+
+
+class EdgePipeline(BackgroundJob, Operator, AddObjectHelper):
+    bl_idname = "op.edge_pipeline"
+    bl_label = "Edges to Mesh"
+
+    def prepare(self, context):
+        scene = context.scene
+        vprops = scene.voodooprops
+
+        refs = reference_empties(context, 'ACTIVE')
+        if refs == []:
+            self.report({'ERROR'}, "Select a reference image first")
+            return None
+
+        my_im = refs[0]
+        job = {'name': my_im.name,
+               'path': reference_path(my_im),
+               'filter1': vprops.canny_filter1,
+               'filter2': vprops.canny_filter2,
+               'cache': edge_cache(vprops),
+               'detector': vprops.edge_detector,
+               'tile_size': vprops.tile_size if vprops.use_tiles else None,
+               'subpixel': vprops.subpixel_points,
+               'timings': new_profile(vprops),
+               'store_dir': None}
+
+        # The mesh only depends on the source file, edge settings and
+        # placement, so an unchanged set skips the edge pass as well
+        job['parts'] = (job['filter1'], job['filter2'], job['detector'],
+                        job['tile_size'], job['subpixel'],
+                        placement_key(my_im))
+        job['current'] = mesh_digest(vprops, my_im.name, 'points')
+        job['digest'] = input_digest(job['path'], *job['parts'],
+                                     compute=False)
+        if job['digest'] is not None and job['digest'] == job['current']:
+            self.report({'INFO'}, my_im.name +
+                        " edge mesh is already up to date")
+            return None
+
+        # Optional side outputs, same places ImagetoCSV and CannyEdges use
+        if vprops.export_edges:
+            job['store_dir'] = os.path.dirname(bpy.data.filepath)
+            job['pts_file'] = point_file(point_dir(vprops), my_im.name,
+                                         vprops.point_format)
+        return job
+
+    # Canny edges straight from the source image, kept as an array so
+    # no JPEG artifacts end up in the point set
+    def run(self, job, progress, cancelled):
+        if hashed_is_current(job, job['path']):
+            return None
+        if job['tile_size'] is not None:
+            edges = tiled_reference(job['path'], job['filter1'],
+                                    job['filter2'], job['cache'],
+                                    job['detector'], job['tile_size'],
+                                    timings=job['timings'])[0]
+        else:
+            edges = reference_edges(job['path'], job['filter1'],
+                                    job['filter2'], job['cache'],
+                                    job['detector'], job['timings'])
+        progress(0.6)
+        if cancelled.is_set():
+            return None
+        with stage(job['timings'], 'points'):
+            coords = np.concatenate(list(band_points(
+                edges, subpixel=job['subpixel'])))
+
+        if job['store_dir'] is not None:
+            with stage(job['timings'], 'write'):
+                cv.imwrite(os.path.join(job['store_dir'],
+                                        job['name'] + "-canny.png"), edges)
+                if job['pts_file'].endswith('.bin'):
+                    write_points(job['pts_file'], coords, edges.shape[1],
+                                 edges.shape[0])
+                else:
+                    with open(job['pts_file'], 'w', newline='') as csv_file:
+                        writer = csv.writer(csv_file)
+                        writer.writerows(coords)
+
+        return edges, coords
+
+    def finish(self, context, job, result):
+        ob = job['name']
+        if result is None:
+            self.report({'INFO'}, ob + " edge mesh is already up to date")
+            return
+        edges, coords = result
+        my_im = bpy.data.objects[ob]
+        edge_maps[ob] = edges
+        timings = job['timings']
+
+        y_pixels, x_pixels = edges.shape
+        with stage(timings, 'transform'):
+            verts = transform_points(
+                reference_transform(my_im, x_pixels, y_pixels), coords)
+        with stage(timings, 'mesh'):
+            obj = canny_mesh(context, verts, ob, operator=self,
+                             digest=job['digest'])
+        keep_profile([ob], self.bl_label, timings)
+        record_stage(context.scene, ob, 'mesh', job['digest'],
+                     {name: job[name] for name in (
+                         'detector', 'filter1', 'filter2', 'tile_size',
+                         'subpixel')}, [obj.name], timings)
+
+
+class ImportContours(BackgroundJob, Operator, AddObjectHelper):
+    bl_idname = "op.im_importcontours"
+    bl_label = "Import Edge Contours"
+
+    def prepare(self, context):
+        scene = context.scene
+        vprops = scene.voodooprops
+
+        refs = reference_empties(context, 'ACTIVE')
+        if refs == []:
+            print("No reference image selected.")
+            return None
+
+        # Contours come from the last Canny run on this view when there is
+        # one, otherwise the edges are worked out again from the source
+        my_im = refs[0]
+        job = {'name': my_im.name,
+               'edges': edge_maps.get(my_im.name),
+               'path': reference_path(my_im),
+               'filter1': vprops.canny_filter1,
+               'filter2': vprops.canny_filter2,
+               'cache': edge_cache(vprops),
+               'detector': vprops.edge_detector,
+               'timings': new_profile(vprops),
+               'epsilon': vprops.contour_epsilon}
+
+        if job['edges'] is not None:
+            job['parts'] = ()
+        else:
+            job['parts'] = (job['filter1'], job['filter2'], job['detector'])
+        job['parts'] += (job['epsilon'], placement_key(my_im))
+        job['current'] = mesh_digest(vprops, my_im.name, 'contours')
+        job['digest'] = input_digest(
+            job['path'] if job['edges'] is None else job['edges'],
+            *job['parts'], compute=False)
+        if job['digest'] is not None and job['digest'] == job['current']:
+            self.report({'INFO'}, my_im.name +
+                        " contour mesh is already up to date")
+            return None
+        return job
+
+    def run(self, job, progress, cancelled):
+        if hashed_is_current(job, job['path'] if job['edges'] is None
+                             else job['edges']):
+            return None
+        edges = job['edges']
+        if edges is None:
+            edges = reference_edges(job['path'], job['filter1'],
+                                    job['filter2'], job['cache'],
+                                    job['detector'], job['timings'])
+        progress(0.5)
+        if cancelled.is_set():
+            return None
+        with stage(job['timings'], 'contours'):
+            points, pairs = contour_polylines(edges, job['epsilon'])
+        return edges, points, pairs
+
+    def finish(self, context, job, result):
+        ob = job['name']
+        if result is None:
+            self.report({'INFO'}, ob + " contour mesh is already up to date")
+            return
+        edges, points, pairs = result
+        my_im = bpy.data.objects[ob]
+        edge_maps[ob] = edges
+        timings = job['timings']
+
+        y_pixels, x_pixels = edges.shape
+        with stage(timings, 'transform'):
+            verts = transform_points(
+                reference_transform(my_im, x_pixels, y_pixels), points)
+        with stage(timings, 'mesh'):
+            obj = canny_mesh(context, verts, ob, operator=self,
+                             edges=pairs, digest=job['digest'])
+        keep_profile([ob], self.bl_label, timings)
+        record_stage(context.scene, ob, 'contours', job['digest'],
+                     {'epsilon': job['epsilon']}, [obj.name], timings)
+
+
+# Snap the selected vertices of the active mesh to the nearest edge of the
+# chosen view.  They move within the view's image plane and keep their
+# depth, so a top view only changes x and y.
+class SnapToEdges(Operator):
+    bl_idname = "op.snap_to_edges"
+    bl_label = "Snap to Edges"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    @classmethod
+    def poll(cls, context):
+        obj = context.active_object
+        return obj is not None and obj.type == 'MESH'
+
+    def execute(self, context):
+        vprops = context.scene.voodooprops
+        index = reference_index(vprops.snap_view)
+        if index is None:
+            self.report({'ERROR'}, "Pick a view with an imported edge mesh "
+                                   "to snap to")
+            return {'CANCELLED'}
+
+        obj = context.active_object
+        mesh = obj.data
+        editing = obj.mode == 'EDIT'
+        if editing:
+            obj.update_from_editmode()
+        count = len(mesh.vertices)
+        selected = np.zeros(count, dtype=bool)
+        mesh.vertices.foreach_get("select", selected)
+        picked = np.flatnonzero(selected)
+        if picked.size == 0:
+            self.report({'WARNING'}, "No vertices selected")
+            return {'CANCELLED'}
+
+        co = np.empty(count * 3, dtype=np.float32)
+        mesh.vertices.foreach_get("co", co)
+        co = co.reshape(-1, 3)
+        matrix = np.array(obj.matrix_world)
+        world = co[picked] @ matrix[:3, :3].T + matrix[:3, 3]
+        snapped, moved = index.snap(world, vprops.snap_distance)
+        local = (snapped - matrix[:3, 3]) @ np.linalg.inv(matrix[:3, :3]).T
+
+        if editing:
+            bm = bmesh.from_edit_mesh(mesh)
+            bm.verts.ensure_lookup_table()
+            for i, position in zip(picked.tolist(), local.tolist()):
+                bm.verts[i].co = position
+            bmesh.update_edit_mesh(mesh)
+        else:
+            co[picked] = local
+            mesh.vertices.foreach_set("co", co.ravel())
+            mesh.update()
+
+        self.report({'INFO'}, "Snapped {} of {} vertices to {} edges".format(
+            int(moved.sum()), picked.size, vprops.snap_view))
+        return {'FINISHED'}
+
+
+class ImageAlpha(Operator):
+    bl_idname = "op.im_alpha"
+    bl_label = "Apply Image Transparency"
+
+    def execute(self, context):
+        scene = context.scene
+        vprops = scene.voodooprops
+
+        # Set transparency for all visible images
+        for im in bpy.data.objects:
+            if im.type == "EMPTY" and im.visible_get():
+                bpy.context.view_layer.objects.active = im
+                obj = bpy.context.active_object
+                obj.use_empty_image_alpha = True
+                bpy.context.object.color[3] = vprops.image_alpha
+
+        return{'FINISHED'}
+
+
+# Finds the extent of the object in every reference image of the scene
+# from its edges, all views at once.  Each view keeps its measurement for
+# Scale Image and Align Views.
+class ExtentJob(BackgroundJob):
+
+    def prepare(self, context):
+        scene = context.scene
+        vprops = scene.voodooprops
+
+        refs = reference_empties(context, 'ALL')
+        if refs == []:
+            print("No reference images in the scene.")
+            return None
+
+        # Edges from the last Canny run on a view are measured as they are
+        return {'names': [obj.name for obj in refs],
+                'paths': [reference_path(obj) for obj in refs],
+                'edges': [edge_maps.get(obj.name) for obj in refs],
+                'filter1': vprops.canny_filter1,
+                'filter2': vprops.canny_filter2,
+                'cache': edge_cache(vprops),
+                'detector': vprops.edge_detector,
+                'tile_size': vprops.tile_size if vprops.use_tiles else None,
+                'method': vprops.measure_method,
+                'trim': vprops.measure_trim,
+                'profiles': [new_profile(vprops) for obj in refs]}
+
+    def run(self, job, progress, cancelled):
+        def measure_job(path, edges, timings):
+            if edges is None and job['tile_size'] is not None:
+                edges = tiled_reference(path, job['filter1'], job['filter2'],
+                                        job['cache'], job['detector'],
+                                        job['tile_size'],
+                                        timings=timings)[0]
+            elif edges is None:
+                edges = reference_edges(path, job['filter1'],
+                                        job['filter2'], job['cache'],
+                                        job['detector'], timings)
+            with stage(timings, 'measure'):
+                extent = object_extent(edges, job['method'], job['trim'])
+            return edges, extent
+
+        results = []
+        with ThreadPoolExecutor(max_workers=os.cpu_count()) as pool:
+            futures = [pool.submit(measure_job, path, edges, timings)
+                       for path, edges, timings in zip(
+                           job['paths'], job['edges'], job['profiles'])]
+            for future in futures:
+                if cancelled.is_set():
+                    for pending in futures:
+                        pending.cancel()
+                    return None
+                results.append(future.result())
+                progress(len(results) / len(futures))
+        return results
+
+    # Store the measurements on the empties and return the measured ones
+    def keep_extents(self, job, result):
+        measured = []
+        for name, timings, (edges, extent) in zip(
+                job['names'], job['profiles'], result):
+            edge_maps[name] = edges
+            keep_profile([name], self.bl_label, timings)
+            if extent is None:
+                continue
+            obj = bpy.data.objects[name]
+            obj['voodoo_extent'] = extent + edges.shape[1::-1]
+            measured.append(obj)
+        return measured
+
+
+# Measure every view and fill the screen measured dimensions from the
+# active one
+class MeasureExtents(ExtentJob, Operator):
+    bl_idname = "op.measure_extents"
+    bl_label = "Measure Extents"
+
+    def finish(self, context, job, result):
+        measured = self.keep_extents(job, result)
+        if context.active_object is not None:
+            fill_measured(context.scene.voodooprops, context.active_object)
+        self.report({'INFO'}, "Measured {} of {} views".format(
+            len(measured), len(result)))
+
+
+# Measure every view, then scale and shift them all together so the object
+# has one size and position along each world axis the views share
+class AlignViews(ExtentJob, Operator):
+    bl_idname = "op.align_views"
+    bl_label = "Align Views"
+
+    def finish(self, context, job, result):
+        vprops = context.scene.voodooprops
+        views = self.keep_extents(job, result)
+        if views == []:
+            self.report({'WARNING'}, "No object found in any view")
+            return
+
+        # The world axis each image axis runs along, with the object's size
+        # and centre and the empty's location on it
+        axes, sizes, centres, pivots = [], [], [], []
+        for obj in views:
+            size, centre = measured_box(obj)
+            matrix = np.array(obj.matrix_world)
+            axis = np.argmax(np.abs(matrix[:3, :2]), axis=0)
+            axes.append(axis)
+            sizes.append(size)
+            centres.append(centre[axis])
+            pivots.append(matrix[axis, 3])
+        targets = (vprops.length_dim, vprops.width_dim, vprops.height_dim) \
+            if vprops.align_to_dims else (0, 0, 0)
+        factors, shifts, extents, mismatch = align_views(
+            axes, sizes, centres, pivots, targets, vprops.align_to_origin)
+
+        # Every empty gets its new scale and location before the one view
+        # layer update
+        for obj, factor, shift, axis in zip(views, factors, shifts, axes):
+            obj.scale[0] *= factor
+            obj.scale[1] *= factor
+            for world_axis, offset in zip(axis, shift):
+                obj.location[world_axis] += offset
+        context.view_layer.update()
+
+        if context.active_object is not None:
+            fill_measured(vprops, context.active_object)
+        shared = " x ".join("{:.3f}".format(extent)
+                            for extent in extents[~np.isnan(extents)])
+        self.report({'INFO'}, "Aligned {} views to {}, sizes agree within "
+                              "{:.1f}%".format(len(views), shared,
+                                               np.abs(mismatch).max() * 100))
+
+
+# Scale the selected reference images so the object they show matches the
+# final dimensions.  Images Measure Extents has seen use their own
+# measurements, any other active image the screen measured dimensions.
+class ScaleSelectedImage(Operator):
+    bl_idname = "op.scale_selected"
+    bl_label = "Scale Image"
+
+    def execute(self, context):
+        scene = context.scene
+        vprops = scene.voodooprops
+
+        # The active image goes last, so the panel shows its measurement
+        active = bpy.context.active_object
+        images = [obj for obj in reference_empties(context, 'SELECTED')
+                  if obj != active and 'voodoo_extent' in obj]
+        if active is not None:
+            images.append(active)
+
+        for obj in images:
+            fill_measured(vprops, obj)
+            dims = VIEW_DIMS.get(file_view(obj.name))
+            if dims is None:
+                print("Scale your custom image manually")
+                continue
+            for axis, dim in enumerate(dims):
+                obj.scale[axis] = (obj.scale[axis] *
+                                   getattr(vprops, dim + '_dim') /
+                                   getattr(vprops, 'meas_' + dim + '_dim'))
+
+        return{'FINISHED'}
+
+
+class SelectDir(Operator, ImportHelper):
+    bl_idname = "op.select_dir"
+    bl_label = "Import File Directory"
+
+    filter_glob: StringProperty(
+        default='*.jpg;*.jpeg;*.png;*.tif;*.tiff;*.bmp', options={'HIDDEN'})
+    auto_spacing: BoolProperty(
+        name='Auto Spacing', description='Check to auto separate images',
+        default=False)
+    decode_in_background: BoolProperty(
+        name='Decode in Background',
+        description='Decode the images into the edge cache on worker '
+                    'threads so the first edge pass skips the read',
+        default=True)
+
+    def execute(self, context):
+        scene = context.scene
+        vprops = scene.voodooprops
+
+        # Empties are made straight from the data API with the probed header
+        # size recorded on the image, Blender only decodes the pixels once
+        # the viewport draws them
+        def open_graphics_files(acceptable_files, dir_path):
+            paths = [os.path.join(dir_path, file[0])
+                     for file in acceptable_files]
+            with stage(timings, 'probe'):
+                sizes = probe_sizes(paths)
+            for file, path, size in zip(acceptable_files, paths, sizes):
+                with stage(timings, 'load'):
+                    image = bpy.data.images.load(path, check_existing=True)
+                    image['voodoo_size'] = size
+                    image.use_fake_user = True
+
+                    # Name the blender image object
+                    obj = bpy.data.objects.new(file[0], None)
+                    obj.empty_display_type = 'IMAGE'
+                    obj.empty_display_size = 5.0
+                    obj.data = image
+                    obj.location = scene.cursor.location
+                    obj.rotation_euler = VIEW_ROTATIONS[file[1]]
+                    context.collection.objects.link(obj)
+                placed.append(obj.name)
+                if vprops.use_proxies:
+                    with stage(timings, 'proxies'):
+                        make_proxy(obj, vprops.proxy_size)
+            return paths
+
+        def image_separate(images):
+
+            # Shift numbers are defined separately because there can be
+            # multiple images for each view
+            shift = {'top': 3, 'front': 3, 'right': 3, 'bottom': 3,
+                     'back': 3, 'left': 3}
+
+            # Rewrite this loop !
+            for ob in bpy.data.objects:
+                if 'top' in ob.name.lower() and ob.type == 'EMPTY':
+                    ob.select_set(state=True)
+                    bpy.context.view_layer.objects.active = ob
+                    bpy.ops.transform.translate(value=(0, 0, shift['top']))
+                    bpy.ops.object.select_all(action='DESELECT')
+                    shift['top'] += 3
+                if 'front' in ob.name.lower() and ob.type == 'EMPTY':
+                    ob.select_set(state=True)
+                    bpy.context.view_layer.objects.active = ob
+                    bpy.ops.transform.translate(value=(0, -shift['front'], 0))
+                    bpy.ops.object.select_all(action='DESELECT')
+                    shift['front'] += 3
+                if 'right' in ob.name.lower() and ob.type == 'EMPTY':
+                    ob.select_set(state=True)
+                    bpy.context.view_layer.objects.active = ob
+                    bpy.ops.transform.translate(value=(shift['right'], 0, 0))
+                    bpy.ops.object.select_all(action='DESELECT')
+                    shift['right'] + 3
+                if 'bottom' in ob.name.lower() and ob.type == 'EMPTY':
+                    ob.select_set(state=True)
+                    bpy.context.view_layer.objects.active = ob
+                    bpy.ops.transform.translate(value=(0, 0, -shift['bottom']))
+                    bpy.ops.object.select_all(action='DESELECT')
+                    shift['bottom'] += 3
+                if 'back' in ob.name.lower() and ob.type == 'EMPTY':
+                    ob.select_set(state=True)
+                    bpy.context.view_layer.objects.active = ob
+                    bpy.ops.transform.translate(value=(0, shift['back'], 0))
+                    bpy.ops.object.select_all(action='DESELECT')
+                    shift['back'] += 3
+                if 'left' in ob.name.lower() and ob.type == 'EMPTY':
+                    ob.select_set(state=True)
+                    bpy.context.view_layer.objects.active = ob
+                    bpy.ops.transform.translate(value=(-shift['left'], 0, 0))
+                    bpy.ops.object.select_all(action='DESELECT')
+                    shift['left'] += 3
+
+            return
+
+        # Main ##########################################################
+
+        timings = new_profile(vprops)
+        placed = []
+
+        # Define the filepath from which the reference images will be pulled
+        loading_directory = os.path.dirname(self.filepath)
+        # Folder to be display in UI
+        vprops.load_directory = os.path.basename(loading_directory)
+
+        # Pull out only graphics files that have proper view names in them
+        with stage(timings, 'scan'):
+            combined = reference_files(loading_directory)
+        paths = open_graphics_files(combined, loading_directory)
+        bpy.ops.object.select_all(action='DESELECT')
+
+        if self.auto_spacing:
+            with stage(timings, 'spacing'):
+                image_separate(combined)
+
+        # Only queueing the decodes is timed, they finish on their own
+        with stage(timings, 'decode'):
+            decoding = self.decode_in_background and \
+                decode_references(paths, edge_cache(vprops))
+        if decoding:
+            self.report({'INFO'}, "Placed {} views, decoding in background"
+                        .format(len(paths)))
+        keep_profile(placed, self.bl_label, timings)
+        return {'FINISHED'}
+
+
+class ExportProfile(Operator, ExportHelper):
+    bl_idname = "op.export_profile"
+    bl_label = "Export Profile"
+    bl_description = "Save the stage timings of the last runs as JSON"
+
+    filename_ext = ".json"
+    filter_glob: StringProperty(default='*.json', options={'HIDDEN'})
+
+    def execute(self, context):
+        if profiles == {}:
+            self.report({'WARNING'}, "Nothing has been profiled yet")
+            return {'CANCELLED'}
+        from . import bl_info
+        write_profile(self.filepath, profiles,
+                      addon='.'.join(str(n) for n in bl_info['version']),
+                      blender=bpy.app.version_string)
+        self.report({'INFO'}, "Profile saved to " + self.filepath)
+        return {'FINISHED'}
+
+
+# Menu Panels  ##############################
+
+class ObjectMtVoodooMenu(bpy.types.Menu):
+    bl_idname = "object.voodoo_menu"
+    bl_label = "Select"
+
+    def draw(self, context):
+        layout = self.layout
+
+
+class ObjectPtVoodooPanel(Panel):
+    bl_idname = "object.voodoo_panel"
+    bl_label = "Conjuur - Image Voodoo"
+    bl_space_type = "VIEW_3D"
+    bl_region_type = "UI"
+    bl_category = "Image Vodoo v2.1 Now With Contours"
+    bl_context = "objectmode"
+
+    def draw(self, context):
+        layout = self.layout
+        scene = context.scene
+        vprops = scene.voodooprops
+
+        layout.prop(vprops, "load_directory", icon="IMAGE_DATA")
+        layout.operator("op.select_dir",  icon="FILEBROWSER")
+        row = layout.row()
+        row.prop(vprops, "use_proxies")
+        if vprops.use_proxies:
+            row.prop(vprops, "proxy_size")
+
+        layout.label(text="Final Scaled Dimensions")
+
+        split = layout.split()
+
+        col = split.row()
+        col.label(text="", icon="ARROW_LEFTRIGHT")
+        col.prop(vprops, "length_dim")
+        col.prop(vprops, "width_dim")
+        col.prop(vprops, "height_dim")
+
+        layout.label(text="Screen Measured Dimensions")
+
+        split = layout.split()
+
+        col = split.row()
+        col.label(text="", icon="ARROW_LEFTRIGHT")
+        col.prop(vprops, "meas_length_dim")
+        col.prop(vprops, "meas_width_dim")
+        col.prop(vprops, "meas_height_dim")
+
+        row = layout.row()
+        row.operator("op.measure_extents",  icon="DRIVER_DISTANCE")
+        row.prop(vprops, "measure_method", text="")
+        if vprops.measure_method == 'PERCENTILE':
+            row.prop(vprops, "measure_trim")
+        layout.operator("op.scale_selected",  icon="FULLSCREEN_ENTER")
+        layout.operator("op.align_views",  icon="ORIENTATION_GLOBAL")
+        row = layout.row()
+        row.prop(vprops, "align_to_dims")
+        row.prop(vprops, "align_to_origin")
+        layout.prop(vprops, "image_alpha", icon="IMAGE_DATA")
+        layout.operator("op.im_alpha",  icon="IMAGE_RGB_ALPHA")
+
+
+class ObjectMtVoodooMenu2(bpy.types.Menu):
+    bl_idname = "object.voodoo_menu2"
+    bl_label = "Select"
+
+    def draw(self, context):
+        layout = self.layout
+
+
+class ObjectPtVoodooPanel2(Panel):
+    bl_idname = "object.voodoo_panel2"
+    bl_label = "Conjuur - Edge Processing"
+    bl_space_type = "VIEW_3D"
+    bl_region_type = "UI"
+    bl_category = "Image Vodoo v2.1 Now With Contours"
+    bl_context = "objectmode"
+
+    def draw(self, context):
+        layout = self.layout
+        scene = context.scene
+        vprops = scene.voodooprops
+
+        layout.operator("op.canny_edges",  icon="EDGESEL")
+        row = layout.row()
+        row.prop(vprops, "edge_targets")
+        row.prop(vprops, "skip_current")
+
+        split = layout.split()
+        col = split.row()
+        col.label(text="", icon="ALIGN_FLUSH")
+        col.prop(vprops, "canny_filter1")
+        col.prop(vprops, "canny_filter2")
+        layout.prop(vprops, "edge_detector")
+        layout.prop(vprops, "use_contours")
+        row = layout.row()
+        row.prop(vprops, "use_tiles")
+        if vprops.use_tiles:
+            row.prop(vprops, "tile_size")
+
+        # Stage timings and peaks of the last runs on the active reference
+        row = layout.row()
+        row.prop(vprops, "trace_memory")
+        row.operator("op.export_profile", icon="EXPORT")
+        obj = context.active_object
+        if obj is not None and obj.name in profiles:
+            box = layout.box()
+            for label, profile in profiles[obj.name].items():
+                box.label(text=label, icon="TIME")
+                for name, seconds in profile.items():
+                    text = "{}: {:.0f} ms".format(name, seconds * 1000)
+                    if name in profile.peaks:
+                        text += ", {:.1f} MB".format(
+                            profile.peaks[name] / 2**20)
+                    box.label(text=text)
+                if profile.cached:
+                    box.label(text="Edges came from the cache")
+
+        row = layout.row()
+        row.prop(vprops, "live_preview")
+        if vprops.live_preview:
+            row.prop(vprops, "preview_size")
+            layout.label(text="Preview: {:.0f} ms".format(
+                preview_stats['ms']))
+
+        # layout.prop(vprops, "image_toggle", text="", icon="IMAGE_RGB_ALPHA")
+        # layout.operator("op.im_switchtypes")  # ,  icon="")
+        layout.operator("op.im_createcsv",  icon="STICKY_UVS_DISABLE")
+        row = layout.row()
+        row.prop(vprops, "point_format")
+        row.prop(vprops, "subpixel_points")
+        layout.operator("op.im_importcsv",  icon="STICKY_UVS_LOC")
+        layout.operator("op.edge_pipeline",  icon="MESH_DATA")
+
+        row = layout.row()
+        row.operator("op.im_importcontours",  icon="IPO_LINEAR")
+        row.prop(vprops, "contour_epsilon")
+        layout.prop(vprops, "export_edges")
+        layout.prop(vprops, "update_meshes")
+
+        box = layout.box()
+        box.prop(vprops, "use_cache")
+        if vprops.use_cache:
+            box.prop(vprops, "cache_size")
+            box.prop(vprops, "cache_dir")
+
+
+class ObjectPtVoodooPanel3(Panel):
+    bl_idname = "object.voodoo_panel3"
+    bl_label = "Conjuur - Edge Snapping"
+    bl_space_type = "VIEW_3D"
+    bl_region_type = "UI"
+    bl_category = "Image Vodoo v2.1 Now With Contours"
+    bl_context = "mesh_edit"
+
+    def draw(self, context):
+        layout = self.layout
+        scene = context.scene
+        vprops = scene.voodooprops
+
+        layout.prop_search(vprops, "snap_view", scene, "objects")
+        layout.prop(vprops, "snap_distance")
+        layout.operator("op.snap_to_edges",  icon="SNAP_ON")
+
+
+# Registration #################################
+
+classes = (VoodooInputs,
+           ObjectPtVoodooPanel,
+           ObjectPtVoodooPanel2,
+           ObjectPtVoodooPanel3,
+           SelectDir,
+           MeasureExtents,
+           AlignViews,
+           ScaleSelectedImage,
+           ImageAlpha,
+           ImportPixels,
+           EdgePipeline,
+           ImportContours,
+           SnapToEdges,
+           ImagetoCSV,
+           CannyEdges,
+           ExportProfile,
+           ObjectMtVoodooMenu,
+           ObjectMtVoodooMenu2
+           )
+
+
+def register():
+    from bpy.utils import register_class
+    for cls in classes:
+        register_class(cls)
+
+    bpy.types.Scene.voodooprops = PointerProperty(type=VoodooInputs)
+
+
+def unregister():
+    global decode_pool
+    if bpy.app.timers.is_registered(fill_proxies):
+        bpy.app.timers.unregister(fill_proxies)
+    if decode_pool is not None:
+        decode_pool.shutdown(wait=False, cancel_futures=True)
+        decode_pool = None
+    decode_jobs.clear()
+    proxy_jobs.clear()
+    profiles.clear()
+    edge_indexes.clear()
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+    from bpy.utils import unregister_class
+    for cls in reversed(classes):
+        unregister_class(cls)
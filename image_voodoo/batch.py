@@ -0,0 +1,271 @@
+'''
+Copyright (C) 2021 Conjuur
+Created by Matt Myers
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+'''
+
+# Headless batch processing of reference image folders.
+#
+#   python -m image_voodoo SET_DIR [SET_DIR ...]
+#   blender -b --python image_voodoo/batch.py -- SET_DIR [SET_DIR ...] --blend
+#
+# Every view image in a folder (named the way Import File Directory expects:
+# top, front, right, bottom, back, left) gets its canny image and point file
+# written next to it, or to --out.  Under Blender --blend also builds the
+# edge meshes and saves one .blend per folder.  A manifest next to the
+# results records what each view was made from, so a re-run only redoes
+# the views and stages that went stale.
+
+import argparse
+import os
+import sys
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+if __name__ == '__main__' and not __package__:
+    # Started as a script, e.g. blender -b --python image_voodoo/batch.py
+    sys.path.insert(0, os.path.dirname(os.path.dirname(
+        os.path.abspath(__file__))))
+    from image_voodoo.batch import main
+    sys.exit(main())
+
+import numpy as np
+import cv2 as cv
+
+from . import pipeline
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(
+        prog='image_voodoo',
+        description='Make edge maps, point files and meshes for folders of '
+                    'reference images.')
+    parser.add_argument('sets', nargs='+', metavar='SET_DIR',
+                        help='folder of top/front/right/... images')
+    parser.add_argument('--out', help='write results here instead of next '
+                        'to the images, one sub folder per set')
+    parser.add_argument('--filter1', type=int, default=30,
+                        help='Canny edge filter 1')
+    parser.add_argument('--filter2', type=int, default=200,
+                        help='Canny edge filter 2')
+    parser.add_argument('--format', choices=['binary', 'csv'],
+                        default='binary', help='point file format')
+    parser.add_argument('--subpixel', action='store_true',
+                        help='one sub-pixel point along the centre of each '
+                             'edge line instead of every edge pixel')
+    parser.add_argument('--contours', action='store_true',
+                        help='also write the colored contour image')
+    parser.add_argument('--detector', default='bilateral',
+                        choices=[name.lower() for name in pipeline.DETECTORS],
+                        help='edge detector, as in the add-on panel')
+    parser.add_argument('--tile-size', type=int, default=0,
+                        help='work in tiles of this many pixels a side to '
+                             'bound memory on large scans (0 = whole image)')
+    parser.add_argument('--cache', help='edge cache directory')
+    parser.add_argument('--cache-size', type=int, default=2048,
+                        help='edge cache size in MB')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                        help='images processed at once')
+    parser.add_argument('--blend', action='store_true',
+                        help='build edge meshes and save a .blend per set '
+                             '(needs Blender)')
+    parser.add_argument('--display-size', type=float, default=5.0,
+                        help='reference image size in blender units')
+    parser.add_argument('--profile', metavar='FILE',
+                        help='write the stage timings of every view to this '
+                             'JSON file')
+    parser.add_argument('--trace-memory', action='store_true',
+                        help='also record the peak memory of each stage '
+                             'that ran on its own, every stage with '
+                             '--workers 1 (slower)')
+    parser.add_argument('--force', action='store_true',
+                        help='redo every view even when the manifest says '
+                             'its results are current')
+    return parser.parse_args(argv)
+
+
+# Folder the results of a reference set go to
+def output_dir(args, set_dir):
+    if args.out is None:
+        return set_dir
+    out_dir = os.path.join(args.out, os.path.basename(
+        os.path.normpath(set_dir)))
+    os.makedirs(out_dir, exist_ok=True)
+    return out_dir
+
+
+MANIFEST_NAME = 'voodoo-manifest.json'
+
+# Profile entries of the points stage, the rest belong to the canny stage
+POINT_STAGES = {'points', 'write'}
+
+
+# Edge map, contour image and point file for one view image, skipping the
+# stages manifest shows are current.  The stage timings go into runs under
+# the image path when given.
+def process_view(args, cache, set_dir, name, view, runs=None,
+                 manifest=None):
+    path = os.path.join(set_dir, name)
+    out_dir = output_dir(args, set_dir)
+    if manifest is None:
+        manifest = pipeline.Manifest()
+
+    timings = pipeline.Profile()
+    detector = args.detector.upper()
+    filename = pipeline.point_file(out_dir, name, args.format.upper())
+    canny_file = os.path.join(out_dir, name + '-canny.png')
+    contours_file = os.path.join(out_dir, name + '-contours.png')
+
+    canny_params = {'detector': detector, 'filter1': args.filter1,
+                    'filter2': args.filter2, 'tile_size': args.tile_size,
+                    'contours': args.contours}
+    canny_key = pipeline.content_digest(
+        manifest.source_digest(name, path), sorted(canny_params.items()))
+    points_params = {'format': args.format, 'subpixel': args.subpixel}
+    points_key = pipeline.content_digest(canny_key,
+                                         sorted(points_params.items()))
+    canny_current = not args.force and \
+        manifest.is_current(name, 'canny', canny_key)
+    if canny_current and manifest.is_current(name, 'points', points_key):
+        print('{}: up to date'.format(path))
+        if not args.blend:
+            return None, 0, 0
+        edges = cv.imread(canny_file, cv.IMREAD_GRAYSCALE)
+    else:
+        drawing = None
+        if args.tile_size:
+            # Points stream out per tile, the edge map is only whole on
+            # disk, so both stages are redone
+            with pipeline.PointWriter(filename,
+                                      subpixel=args.subpixel) as writer:
+                edges, _, drawing = pipeline.tiled_reference(
+                    path, args.filter1, args.filter2, cache, detector,
+                    args.tile_size, writer=writer, contours=args.contours,
+                    timings=timings, subpixel=args.subpixel)
+            count = writer.count
+            canny_current = False
+        else:
+            if canny_current:
+                # Only the point file is stale, it is made from the canny
+                # image already written
+                with pipeline.stage(timings, 'read'):
+                    edges = cv.imread(canny_file, cv.IMREAD_GRAYSCALE)
+            else:
+                edges, drawing = pipeline.process_reference(
+                    path, args.filter1, args.filter2, cache, detector,
+                    timings, args.contours)
+            count = pipeline.stream_points(filename, edges, timings=timings,
+                                           subpixel=args.subpixel)
+
+        if not canny_current:
+            with pipeline.stage(timings, 'encode'):
+                cv.imwrite(canny_file, edges)
+                if drawing is not None:
+                    cv.imwrite(contours_file, drawing)
+            manifest.record(
+                name, 'canny', canny_key, canny_params,
+                [canny_file] + ([contours_file] if args.contours else []),
+                {label: seconds for label, seconds in timings.items()
+                 if label not in POINT_STAGES})
+        manifest.record(
+            name, 'points', points_key, points_params, [filename],
+            {label: seconds for label, seconds in timings.items()
+             if label in POINT_STAGES})
+        if runs is not None:
+            runs[path] = {'batch': timings}
+        print('{}: {} edge points ({})'.format(path, count, ', '.join(
+            '{} {:.0f} ms'.format(stage, seconds * 1000)
+            for stage, seconds in timings.items())))
+
+    height, width = edges.shape
+    coords = np.concatenate(list(pipeline.band_points(
+        edges, subpixel=args.subpixel))) if args.blend else None
+    return coords, width, height
+
+
+# Edge meshes for one reference set, placed on their reference images the
+# way Import Edge Pixels places them, saved as <set>.blend
+def save_blend(args, set_dir, views):
+    import bpy
+    from .addon import edge_mesh, reference_transform, VIEW_ROTATIONS
+
+    bpy.ops.wm.read_factory_settings(use_empty=True)
+    scene = bpy.context.scene
+    for (name, view), (coords, width, height) in views:
+        # The reference itself, placed the way SelectDir places it
+        image = bpy.data.images.load(os.path.join(set_dir, name))
+        image.use_fake_user = True
+        image['voodoo_size'] = (width, height)
+        empty = bpy.data.objects.new(name, None)
+        empty.empty_display_type = 'IMAGE'
+        empty.empty_display_size = args.display_size
+        empty.data = image
+        empty.rotation_euler = VIEW_ROTATIONS[view]
+        scene.collection.objects.link(empty)
+
+        # Edges go through the same pixel to world transform as the add-on
+        verts = pipeline.transform_points(
+            reference_transform(empty, width, height), coords)
+        mesh = edge_mesh(name.capitalize() + " Mesh", verts)
+        scene.collection.objects.link(bpy.data.objects.new(mesh.name, mesh))
+
+    filename = os.path.join(output_dir(args, set_dir), os.path.basename(
+        os.path.normpath(set_dir)) + '.blend')
+    bpy.ops.wm.save_as_mainfile(filepath=filename)
+    print('saved {}'.format(filename))
+
+
+def main(argv=None):
+    if argv is None:
+        argv = sys.argv[sys.argv.index('--') + 1:] if '--' in sys.argv \
+            else sys.argv[1:]
+    args = parse_args(argv)
+
+    if args.trace_memory:
+        tracemalloc.start()
+    cache = None
+    if args.cache:
+        cache = pipeline.EdgeCache(args.cache, args.cache_size * 2**20)
+
+    jobs = [(set_dir, name, view) for set_dir in args.sets
+            for name, view in pipeline.reference_files(set_dir)]
+    if jobs == []:
+        print('No reference images found.')
+        return 1
+
+    runs = {}
+    manifests = {set_dir: pipeline.Manifest.load(os.path.join(
+        output_dir(args, set_dir), MANIFEST_NAME)) for set_dir in args.sets}
+
+    # Every view of every set goes through one pool, results come back in
+    # order so each set's manifest is saved and its meshes built once its
+    # views are done
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        results = pool.map(
+            lambda job: process_view(args, cache, *job, runs,
+                                     manifests[job[0]]), jobs)
+        views = []
+        for i, ((set_dir, name, view), result) in enumerate(zip(jobs,
+                                                                results)):
+            views.append(((name, view), result))
+            if i + 1 < len(jobs) and jobs[i + 1][0] == set_dir:
+                continue
+            manifests[set_dir].save(os.path.join(output_dir(args, set_dir),
+                                                 MANIFEST_NAME))
+            if args.blend:
+                save_blend(args, set_dir, views)
+            views = []
+
+    if args.profile:
+        pipeline.write_profile(args.profile, runs, tool='batch')
+        print('profile saved to {}'.format(args.profile))
+    return 0
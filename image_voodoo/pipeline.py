@@ -0,0 +1,1322 @@
+'''
+Copyright (C) 2021 Conjuur
+Created by Matt Myers
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+'''
+
+
+# The OpenCV and NumPy side of Image Voodoo.  Nothing in here touches bpy, so
+# the edge, point and cache code runs the same inside Blender, in the
+# headless batch tool and in plain Python.
+
+import os
+import json
+import struct
+import hashlib
+import platform
+import tempfile
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+import numpy as np
+import cv2 as cv
+from PIL import Image
+
+VIEW_NAMES = ['top', 'front', 'right', 'bottom', 'back', 'left']
+
+# Allowable reference image file types
+IMAGE_ENDINGS = ['png', 'bmp', 'jpg', 'jpeg', 'tif', 'tiff']
+
+# Edge Helpers ##########################
+
+
+# Pull every edge pixel out of an edge image as (x, y, 1) points in one pass.
+# Rows are flipped so the bottom row of the image is y = 0.  A block cut
+# from a larger edge map passes its (x, y) offset and the full height.
+def edge_points(edges, threshold=128, offset=(0, 0), height=None):
+    if edges.ndim == 3:
+        edges = edges[..., 0]
+    if height is None:
+        height = edges.shape[0]
+    rows, cols = np.nonzero(edges >= threshold)
+    coords = np.ones((rows.size, 3))
+    coords[:, 0] = cols + offset[0]
+    coords[:, 1] = height - 1 - offset[1] - rows
+    return coords
+
+
+# Blur the edge map gets before its line centres are fitted.  Lines up to
+# about three pixels wide, or soft from anti-aliasing, still have a single
+# ridge at this width.
+RIDGE_SIGMA = 1.0
+
+# Rows of neighbours the blur and the fit need around a block
+RIDGE_HALO = 6
+
+
+# Centre lines of the edges in an edge map at sub-pixel precision, as float
+# (rows, cols).  The map is blurred so every line, however thick, becomes a
+# ridge.  The ridge's normal comes from the Hessian, and the fit along it
+# gives the offset of the crest from each edge pixel.  Only pixels whose own
+# half-pixel holds the crest are kept, which thins the line to one point
+# per pixel along it.  That is non-maximum suppression across the line.
+# Rows outside core (start, stop) only serve as context.
+def ridge_centres(edges, threshold=128, sigma=RIDGE_SIGMA, core=None):
+    if edges.ndim == 3:
+        edges = edges[..., 0]
+    candidates = edges >= threshold
+    if core is not None:
+        candidates[:core[0]] = False
+        candidates[core[1]:] = False
+    rows, cols = np.nonzero(candidates)
+    smooth = cv.GaussianBlur(edges.astype(np.float32), (0, 0), sigma)
+    smooth = cv.copyMakeBorder(smooth, 1, 1, 1, 1, cv.BORDER_REPLICATE)
+
+    # Derivatives at the edge pixels only, by central differences
+    r, c = rows + 1, cols + 1
+    centre = smooth[r, c]
+    left, right = smooth[r, c - 1], smooth[r, c + 1]
+    up, down = smooth[r - 1, c], smooth[r + 1, c]
+    gx, gy = (right - left) / 2, (down - up) / 2
+    rxx = right - 2 * centre + left
+    ryy = down - 2 * centre + up
+    rxy = (smooth[r + 1, c + 1] - smooth[r + 1, c - 1] -
+           smooth[r - 1, c + 1] + smooth[r - 1, c - 1]) / 4
+
+    # Most negative Hessian eigenvalue and its eigenvector, the direction
+    # straight across the line
+    half = (rxx - ryy) / 2
+    curve = (rxx + ryy) / 2 - np.sqrt(half * half + rxy * rxy)
+    ax, ay = rxy, curve - rxx
+    bx, by = curve - ryy, rxy
+    first = ax * ax + ay * ay >= bx * bx + by * by
+    nx, ny = np.where(first, ax, bx), np.where(first, ay, by)
+    norm = np.hypot(nx, ny)
+    flat = norm == 0
+    norm[flat] = 1
+    nx, ny = nx / norm, ny / norm
+    nx[flat] = 1
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        step = -(gx * nx + gy * ny) / curve
+    # Half-open, so a crest right between two pixels of an even-width line
+    # belongs to one of them only
+    dx, dy = step * nx, step * ny
+    keep = (curve < 0) & (-0.5 < dx) & (dx <= 0.5) & (-0.5 < dy) & \
+        (dy <= 0.5)
+    return rows[keep] + dy[keep], cols[keep] + dx[keep]
+
+
+# Line centre points of an edge image as (x, y, 1) floats, flipped and
+# offset like edge_points.  Points that still share a half-pixel cell after
+# the fit are merged.
+def subpixel_points(edges, threshold=128, offset=(0, 0), height=None,
+                    core=None):
+    if height is None:
+        height = edges.shape[0]
+    rows, cols = ridge_centres(edges, threshold, core=core)
+    coords = np.ones((rows.size, 3))
+    coords[:, 0] = cols + offset[0]
+    coords[:, 1] = height - 1 - offset[1] - rows
+    # Rounded first, so float noise cannot split a point between two cells
+    cells = np.floor(np.round(coords[:, :2] * 2, 3))
+    if len(cells):
+        first = np.unique(cells, axis=0, return_index=True)[1]
+        coords = coords[np.sort(first)]
+    return coords
+
+
+# edge_points a band of rows at a time, so only one band is thresholded at
+# once however large the edge map is.  With subpixel the line centres of
+# subpixel_points come out instead, each band fitted with a few rows of its
+# neighbours around it.
+def band_points(edges, rows=2048, subpixel=False):
+    height = edges.shape[0]
+    for y in range(0, height, rows):
+        if not subpixel:
+            yield edge_points(edges[y:y + rows], offset=(0, y),
+                              height=height)
+            continue
+        top = max(0, y - RIDGE_HALO)
+        yield subpixel_points(edges[top:y + rows + RIDGE_HALO],
+                              offset=(0, top), height=height,
+                              core=(y - top, y - top + rows))
+
+
+# Contours of an edge map as polylines: (N, 2) pixel points, rows flipped
+# like edge_points, and (M, 2) vertex index pairs joining them.  With
+# epsilon > 0 each contour is simplified with Douglas-Peucker first.  Canny
+# lines are traced along both sides, so repeated points are welded and
+# doubled segments dropped.
+def contour_polylines(edges, epsilon=0.0):
+    contours, hierarchy = cv.findContours(edges, cv.RETR_LIST,
+                                          cv.CHAIN_APPROX_SIMPLE)
+    if epsilon > 0:
+        contours = [cv.approxPolyDP(c, epsilon, True) for c in contours]
+    contours = [c.reshape(-1, 2) for c in contours if len(c) > 1]
+    if contours == []:
+        return np.zeros((0, 2), dtype=np.float32), \
+            np.zeros((0, 2), dtype=np.int32)
+
+    # Each point joins the next one, the last point of a contour closes it
+    counts = np.array([len(c) for c in contours])
+    starts = np.cumsum(counts) - counts
+    following = np.arange(1, counts.sum() + 1)
+    following[starts + counts - 1] = starts
+    points = np.concatenate(contours)
+
+    points, welded = np.unique(points, axis=0, return_inverse=True)
+    welded = welded.ravel()
+    pairs = np.sort(np.stack([welded, welded[following]], axis=1), axis=1)
+    pairs = np.unique(pairs[pairs[:, 0] != pairs[:, 1]], axis=0)
+
+    points = points.astype(np.float32)
+    points[:, 1] = edges.shape[0] - 1 - points[:, 1]
+    return points, pairs.astype(np.int32)
+
+
+# Binary point files hold a small header and then the raw (N, 2) array of
+# pixel x, y coordinates, so they can be memory-mapped straight back in:
+#   magic, version, dtype code, image width, image height, point count
+POINT_HEADER = struct.Struct('<4sHHIIQ')
+POINT_MAGIC = b'VDPT'
+POINT_DTYPES = {1: np.uint16, 2: np.uint32, 3: np.float32}
+
+
+# Write (x, y[, z]) points as a binary point file.  Whole pixel coordinates
+# are stored as uint16 or uint32, anything else as float32.
+def write_points(filename, coords, width, height):
+    xy = np.asarray(coords)[:, :2]
+    if xy.dtype.kind == 'f' and not np.array_equal(xy, np.floor(xy)):
+        code = 3
+    elif max(width, height) <= np.iinfo(np.uint16).max:
+        code = 1
+    else:
+        code = 2
+    with open(filename, 'wb') as f:
+        f.write(POINT_HEADER.pack(POINT_MAGIC, 1, code, width, height,
+                                  len(xy)))
+        f.write(np.ascontiguousarray(xy, dtype=POINT_DTYPES[code]).data)
+
+
+# Image width, height and point count from a binary point file header
+def read_point_header(filename):
+    with open(filename, 'rb') as f:
+        magic, version, code, width, height, count = \
+            POINT_HEADER.unpack(f.read(POINT_HEADER.size))
+    if magic != POINT_MAGIC:
+        raise ValueError("{} is not a point file".format(filename))
+    return code, width, height, count
+
+
+# Point file written a block of points at a time, binary or CSV by its
+# extension.  A binary file's header gets its point count on close, so the
+# points never have to be held all at once.  Whole pixel points unless
+# subpixel, which stores float32; the image size may be set after opening,
+# up to the first write.
+class PointWriter:
+    def __init__(self, filename, width=0, height=0, subpixel=False):
+        self.binary = filename.endswith('.bin')
+        self.width = width
+        self.height = height
+        self.subpixel = subpixel
+        self.count = 0
+        self.file = open(filename, 'wb')
+        if self.binary:
+            self.file.write(self.header())
+
+    @property
+    def code(self):
+        if self.subpixel:
+            return 3
+        if max(self.width, self.height) <= np.iinfo(np.uint16).max:
+            return 1
+        return 2
+
+    def header(self):
+        return POINT_HEADER.pack(POINT_MAGIC, 1, self.code, self.width,
+                                 self.height, self.count)
+
+    def write(self, coords):
+        if self.binary:
+            self.file.write(np.ascontiguousarray(
+                np.asarray(coords)[:, :2], dtype=POINT_DTYPES[self.code]).data)
+        else:
+            np.savetxt(self.file, coords,
+                       fmt='%.3f' if self.subpixel else '%.1f', delimiter=',')
+        self.count += len(coords)
+
+    def close(self):
+        if self.binary:
+            self.file.seek(0)
+            self.file.write(self.header())
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# Stream the points of an edge map to a point file band by band and return
+# how many there were, line centres with subpixel.  Finding and writing the
+# points are timed into timings when given.
+def stream_points(filename, edges, rows=2048, timings=None, subpixel=False):
+    height, width = edges.shape[:2]
+    bands = band_points(edges, rows, subpixel)
+    with PointWriter(filename, width, height, subpixel) as writer:
+        while True:
+            with stage(timings, 'points'):
+                coords = next(bands, None)
+            if coords is None:
+                break
+            with stage(timings, 'write'):
+                writer.write(coords)
+    return writer.count
+
+
+# Memory-map the (N, 2) point array of a binary point file
+def read_points(filename):
+    code, width, height, count = read_point_header(filename)
+    if count == 0:
+        return np.zeros((0, 2), dtype=POINT_DTYPES[code])
+    return np.memmap(filename, dtype=POINT_DTYPES[code], mode='r',
+                     offset=POINT_HEADER.size, shape=(count, 2))
+
+
+# Point file written for a view in the chosen format
+def point_file(store_dir, name, point_format):
+    return os.path.join(store_dir, name + (
+        '-pts.bin' if point_format == 'BINARY' else '-pts.txt'))
+
+
+# Profiling #############################
+
+
+# Seconds each stage of a run took, the same stage -> seconds dict the
+# timings arguments have always been, plus each stage's peak memory in bytes
+# while tracemalloc is tracing.  Peaks count NumPy and OpenCV arrays but not
+# OpenCV's scratch buffers.  tracemalloc only has one peak for the whole
+# process, so a stage that ran alongside another traced stage gets no peak.
+# cached is set when the edges came from the edge cache without running
+# the detector.
+class Profile(dict):
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.peaks = {}
+        self.cached = False
+
+    # Stage -> {'seconds', 'peak_mb'}, peak_mb None when it wasn't traced
+    def report(self):
+        return {name: {'seconds': seconds,
+                       'peak_mb': self.peaks[name] / 2**20
+                       if name in self.peaks else None}
+                for name, seconds in self.items()}
+
+
+# Traced stages running right now, each a dict saying whether another
+# stage ran at the same time
+_traced_stages = []
+_traced_lock = threading.Lock()
+
+
+# Time the with block into timings[name], adding to earlier runs of the
+# stage, and for a Profile its peak memory above what was in use before,
+# when no other traced stage overlapped it.  Does nothing when timings is
+# None.
+@contextmanager
+def stage(timings, name):
+    if timings is None:
+        yield
+        return
+    traced = isinstance(timings, Profile) and tracemalloc.is_tracing()
+    if traced:
+        entry = {'overlapped': False}
+        with _traced_lock:
+            if _traced_stages:
+                entry['overlapped'] = True
+                for other in _traced_stages:
+                    other['overlapped'] = True
+            else:
+                tracemalloc.reset_peak()
+            _traced_stages.append(entry)
+            base = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[name] = timings.get(name, 0) + time.perf_counter() - start
+        if traced:
+            with _traced_lock:
+                peak = tracemalloc.get_traced_memory()[1] - base
+                _traced_stages.remove(entry)
+            if not entry['overlapped']:
+                timings.peaks[name] = max(peak, timings.peaks.get(name, 0))
+
+
+# Write profiles as JSON along with the machine and library versions, so
+# runs can be compared across machines and releases.  runs maps a reference
+# name to {operator: Profile}, info adds fields such as the add-on version.
+def write_profile(filename, runs, **info):
+    report = {'platform': platform.platform(),
+              'processor': platform.processor() or platform.machine(),
+              'cpus': os.cpu_count(),
+              'python': platform.python_version(),
+              'numpy': np.__version__,
+              'opencv': cv.__version__,
+              'memory_traced': tracemalloc.is_tracing()}
+    report.update(info)
+    report['references'] = {
+        name: {operator: profile.report()
+               for operator, profile in operators.items()}
+        for name, operators in runs.items()}
+    with open(filename, 'w') as json_file:
+        json.dump(report, json_file, indent=2)
+
+
+# Edge Detectors ########################
+
+
+# Every detector stage takes the previous stage's image and the two
+# threshold sliders.  Stages that ignore the sliders are listed in
+# FIXED_STAGES so their cached results are shared across threshold changes.
+
+# Bilateral filter ahead of Canny, its sigmas follow the Canny thresholds
+def filter_gray(gray, filter1, filter2):
+    return cv.bilateralFilter(gray, 7, filter1*2, filter2*2)
+
+
+def gaussian_gray(gray, filter1, filter2):
+    return cv.GaussianBlur(gray, (5, 5), 0)
+
+
+def canny(gray, filter1, filter2):
+    return cv.Canny(gray, filter1, filter2)
+
+
+# Canny with its thresholds set around the median intensity instead of the
+# sliders.  The median comes from the histogram, which is much cheaper than
+# sorting a large image.
+def auto_canny(gray, filter1, filter2):
+    counts = cv.calcHist([gray], [0], None, [256], [0, 256]).ravel()
+    return cv.Canny(gray, *median_thresholds(counts))
+
+
+# Canny thresholds either side of the median of a 256 bin histogram
+def median_thresholds(counts, sigma=0.33):
+    median = np.searchsorted(np.cumsum(counts), counts.sum() / 2)
+    return int(max(0, (1 - sigma) * median)), \
+        int(min(255, (1 + sigma) * median))
+
+
+# Dark strokes of a line drawing picked out against their local mean in a
+# single pass, no smoothing or gradient work
+def adaptive_lines(gray, filter1, filter2):
+    return cv.adaptiveThreshold(gray, 255, cv.ADAPTIVE_THRESH_MEAN_C,
+                                cv.THRESH_BINARY_INV, 15, 10)
+
+
+# Sobel gradient magnitude (L1, as Canny uses) cut at the first threshold.
+# Edges come out thicker than Canny's but without the hysteresis pass.
+def sobel_edges(gray, filter1, filter2):
+    magnitude = cv.add(
+        cv.convertScaleAbs(cv.Sobel(gray, cv.CV_16S, 1, 0)),
+        cv.convertScaleAbs(cv.Sobel(gray, cv.CV_16S, 0, 1)))
+    return cv.threshold(magnitude, min(filter1, 254), 255,
+                        cv.THRESH_BINARY)[1]
+
+
+# Named stages run after the grayscale read, by detector
+DETECTORS = {
+    'CANNY': [('canny', canny)],
+    'GAUSSIAN': [('gaussian', gaussian_gray), ('canny', canny)],
+    'BILATERAL': [('bilateral', filter_gray), ('canny', canny)],
+    'AUTO': [('gaussian', gaussian_gray), ('auto canny', auto_canny)],
+    'ADAPTIVE': [('adaptive', adaptive_lines)],
+    'SOBEL': [('sobel', sobel_edges)],
+}
+
+FIXED_STAGES = {'gaussian', 'auto canny', 'adaptive'}
+
+
+# Cache key parts of each stage of a detector.  A stage's key names every
+# stage up to it, plus the thresholds once any of them uses the sliders.
+def stage_keys(detector, filter1, filter2):
+    keys = []
+    names = ()
+    thresholds = ()
+    for name, func in DETECTORS[detector]:
+        names += (name,)
+        if name not in FIXED_STAGES:
+            thresholds = (filter1, filter2)
+        keys.append(names + thresholds)
+    return keys
+
+
+# Run a detector on a grayscale image without any caching, timing each stage
+# into timings when given
+def detect(gray, detector, filter1, filter2, timings=None):
+    image = gray
+    for name, func in DETECTORS[detector]:
+        with stage(timings, name):
+            image = func(image, filter1, filter2)
+    return image
+
+
+# Eroding with a cross keeps the pixels touching the background sideways,
+# the ones contour tracing follows
+OUTLINE_KERNEL = cv.getStructuringElement(cv.MORPH_CROSS, (3, 3))
+
+
+# Draw each connected edge of an edge map in a random color.  The outline
+# pixels are labelled in one pass and colored through a lookup table, so
+# noisy maps with many thousands of contours cost no more than clean ones.
+# Each call seeds its own generator so the colors don't depend on which
+# thread ran first.
+def draw_contours(edges, seed=12345):
+    # Thick edges only show their border, like the traced contours did
+    outline = cv.subtract(edges, cv.erode(edges, OUTLINE_KERNEL))
+    count, labels = cv.connectedComponents(outline, connectivity=8,
+                                           ltype=cv.CV_32S)
+    palette = np.random.default_rng(seed).integers(0, 256, (count, 3),
+                                                   dtype=np.uint8)
+    # Only the outline is looked up, edges are a small part of the image
+    drawing = np.zeros(edges.shape[:2] + (3,), dtype=np.uint8)
+    rows, cols = np.nonzero(outline)
+    drawing[rows, cols] = palette[labels[rows, cols]]
+    return drawing
+
+
+# Decoding straight to one channel never holds the color image
+def read_gray(filepath):
+    return cv.imread(filepath, cv.IMREAD_GRAYSCALE)
+
+
+# Decode a reference into the cache's grayscale stage ahead of the first
+# edge pass.  Returns False when there is no cache to fill.
+def warm_reference(filepath, cache):
+    if cache is None:
+        return False
+    cached(cache, (file_digest(filepath), 'gray'), lambda: read_gray(filepath))
+    return True
+
+
+# Edges of a reference image file.  With a cache the grayscale read and
+# each detector stage are looked up before being recomputed, so changing
+# only the thresholds skips the image read.  Stages that actually ran are
+# timed into timings when given, a Profile is marked cached when none did.
+def reference_edges(filepath, filter1, filter2, cache=None,
+                    detector='BILATERAL', timings=None):
+    digest = file_digest(filepath) if cache is not None else None
+    ran = []
+
+    def timed(name, func, *args):
+        ran.append(name)
+        with stage(timings, name):
+            return func(*args)
+
+    def load_stage(index):
+        if index < 0:
+            return cached(cache, (digest, 'gray'),
+                          lambda: timed('read', read_gray, filepath))
+        name, func = DETECTORS[detector][index]
+        key = (digest,) + stage_keys(detector, filter1, filter2)[index]
+        return cached(cache, key, lambda: timed(
+            name, func, load_stage(index - 1), filter1, filter2))
+
+    edges = load_stage(len(DETECTORS[detector]) - 1)
+    if ran == [] and isinstance(timings, Profile):
+        timings.cached = True
+    return edges
+
+
+# Read a reference image and run the edge and contour passes on it, the
+# contour drawing None without contours.  Only OpenCV and NumPy work happens
+# here so it can run on a worker thread.
+def process_reference(filepath, filter1, filter2, cache=None,
+                      detector='BILATERAL', timings=None, contours=True):
+    edges = reference_edges(filepath, filter1, filter2, cache, detector,
+                            timings)
+    if not contours:
+        return edges, None
+    digest = file_digest(filepath) if cache is not None else None
+
+    def draw():
+        with stage(timings, 'contours'):
+            return draw_contours(edges)
+
+    key = (digest, 'contours', 'labels', detector, filter1, filter2)
+    drawing = cached(cache, key, draw)
+    return edges, drawing
+
+
+# Tiled Edges ###########################
+
+
+# Real pixels read around every tile.  The filters and Canny's gradients
+# need only a few, the rest lets hysteresis follow weak edges over a seam.
+TILE_HALO = 64
+
+
+# Array backed by an unnamed temporary file, for full size tiled results
+# when there is no cache to map them from.  The file goes away with the map.
+def scratch_array(shape, dtype=np.uint8):
+    with tempfile.TemporaryFile() as f:
+        return np.memmap(f, dtype=dtype, mode='w+', shape=shape)
+
+
+# Grayscale image for tiled work, memory-mapped from the cache when there is
+# one, or from a scratch file when not, so it is paged in tile by tile
+# instead of held in memory once decoded
+def gray_source(filepath, cache=None):
+    if cache is None:
+        gray = read_gray(filepath)
+        mapped = scratch_array(gray.shape)
+        mapped[:] = gray
+        return mapped
+    key = cache.key(file_digest(filepath), 'gray')
+    gray = cache.get(key, mmap=True)
+    if gray is None:
+        gray = read_gray(filepath)
+        cache.put(key, gray)
+        mapped = cache.get(key, mmap=True)
+        if mapped is not None:
+            gray = mapped
+    return gray
+
+
+# Run a detector over tile_size blocks of a grayscale image, each with a
+# halo of its neighbours, so filters and gradients at the seams match the
+# untiled result.  Only Canny's hysteresis can differ, for weak edges whose
+# strong anchor lies further than the halo past the tile.  Auto Canny takes
+# its thresholds from the whole image.  Yields (x, y, edge block) in row
+# order; stage times are summed over the tiles into timings.
+def tiled_edges(gray, detector, filter1, filter2, tile_size=2048,
+                halo=TILE_HALO, timings=None):
+    height, width = gray.shape
+    if detector == 'AUTO':
+        counts = sum(cv.calcHist([np.ascontiguousarray(gray[y:y + tile_size])],
+                                 [0], None, [256], [0, 256]).ravel()
+                     for y in range(0, height, tile_size))
+        filter1, filter2 = median_thresholds(counts)
+        detector = 'GAUSSIAN'
+
+    for y in range(0, height, tile_size):
+        for x in range(0, width, tile_size):
+            top, left = max(0, y - halo), max(0, x - halo)
+            window = np.ascontiguousarray(
+                gray[top:y + tile_size + halo, left:x + tile_size + halo])
+            edges = detect(window, detector, filter1, filter2, timings)
+            yield x, y, edges[y - top:y - top + tile_size,
+                              x - left:x - left + tile_size]
+
+
+# Tile by tile edge pass over a reference file.  The full size edge map is
+# written a band at a time into the cache and comes back memory-mapped (a
+# scratch_array without a cache, or with one too small for it).  Points go
+# to writer, a PointWriter given the image size here, as each tile
+# finishes, as line centres with subpixel (fitted without the neighbouring
+# tiles).  With display_edge a shrunk copy of the edges is pieced together
+# from the tiles, and with contours the same for the contour drawing (a
+# full size scratch_array when display_edge is None).  Returns the edge
+# map, display edges and display contours, None for any not asked for.
+# Only a tile's buffers and one band of edges are held in memory at a time,
+# the grayscale source, the edge map and a full size drawing are paged in
+# from disk.
+def tiled_reference(filepath, filter1, filter2, cache=None,
+                    detector='BILATERAL', tile_size=2048, writer=None,
+                    display_edge=None, contours=False, timings=None,
+                    subpixel=False):
+    edges = None
+    if cache is not None:
+        key = cache.key(file_digest(filepath),
+                        *stage_keys(detector, filter1, filter2)[-1],
+                        'tiled', tile_size)
+        edges = cache.get(key, mmap=True)
+
+    if edges is None:
+        with stage(timings, 'read'):
+            gray = gray_source(filepath, cache)
+        height, width = gray.shape
+        blocks = tiled_edges(gray, detector, filter1, filter2, tile_size,
+                             timings=timings)
+    else:
+        if isinstance(timings, Profile):
+            timings.cached = True
+        height, width = edges.shape
+        blocks = ((x, y, edges[y:y + tile_size, x:x + tile_size])
+                  for y in range(0, height, tile_size)
+                  for x in range(0, width, tile_size))
+
+    if writer is not None:
+        writer.width, writer.height = width, height
+    shown_edges = shown_contours = None
+    shown_size = (width, height)
+    if display_edge is not None:
+        shown_size = proxy_shape(shown_size, display_edge) or shown_size
+        shown_edges = np.zeros(shown_size[::-1], dtype=np.uint8)
+    if contours and display_edge is None:
+        # Full size, so it is paged out like the edge map
+        shown_contours = scratch_array(shown_size[::-1] + (3,))
+    elif contours:
+        shown_contours = np.zeros(shown_size[::-1] + (3,), dtype=np.uint8)
+    scale_x, scale_y = shown_size[0] / width, shown_size[1] / height
+
+    # Points and display pieces of one finished tile
+    def visit(x, y, block):
+        if writer is not None:
+            with stage(timings, 'points'):
+                if subpixel:
+                    coords = subpixel_points(block, offset=(x, y),
+                                             height=height)
+                else:
+                    coords = edge_points(block, offset=(x, y),
+                                         height=height)
+            with stage(timings, 'write'):
+                writer.write(coords)
+        left, top = round(x * scale_x), round(y * scale_y)
+        right = round((x + block.shape[1]) * scale_x)
+        bottom = round((y + block.shape[0]) * scale_y)
+        if right <= left or bottom <= top:
+            return
+        if shown_edges is not None:
+            shown_edges[top:bottom, left:right] = cv.resize(
+                block, (right - left, bottom - top),
+                interpolation=cv.INTER_AREA)
+        if shown_contours is not None:
+            with stage(timings, 'contours'):
+                shown_contours[top:bottom, left:right] = cv.resize(
+                    draw_contours(block), (right - left, bottom - top),
+                    interpolation=cv.INTER_AREA)
+
+    # Edge map bands of tile_size rows, pieced together as the tiles arrive
+    def bands():
+        band = None
+        for x, y, block in blocks:
+            block = np.ascontiguousarray(block)
+            visit(x, y, block)
+            if x == 0:
+                if band is not None:
+                    yield band
+                band = np.empty((block.shape[0], width), dtype=np.uint8)
+            band[:, x:x + block.shape[1]] = block
+        if band is not None:
+            yield band
+
+    if edges is not None:
+        for x, y, block in blocks:
+            visit(x, y, np.ascontiguousarray(block))
+    elif cache is not None and height * width <= cache.max_bytes:
+        cache.put_rows(key, (height, width), bands())
+        edges = cache.get(key, mmap=True)
+    else:
+        edges = scratch_array((height, width))
+        for y, band in zip(range(0, height, tile_size), bands()):
+            edges[y:y + len(band)] = band
+    return edges, shown_edges, shown_contours
+
+
+# Edge Cache ############################
+
+
+# Content hashes of source images, remembered by path, size and modification
+# time so an unchanged file is only read once per session
+_digests = {}
+
+
+def file_digest(filepath):
+    stat = os.stat(filepath)
+    stamp = (filepath, stat.st_size, stat.st_mtime_ns)
+    if stamp not in _digests:
+        sha = hashlib.sha1()
+        with open(filepath, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                sha.update(chunk)
+        _digests[stamp] = sha.hexdigest()
+    return _digests[stamp]
+
+
+# file_digest when the file was already hashed this session as it is now,
+# otherwise None without reading it
+def known_digest(filepath):
+    stat = os.stat(filepath)
+    return _digests.get((filepath, stat.st_size, stat.st_mtime_ns))
+
+
+# Content hash of arrays and plain values together, for telling whether
+# something built from them is still current
+def content_digest(*parts):
+    sha = hashlib.sha1()
+    for part in parts:
+        if isinstance(part, np.ndarray):
+            sha.update(repr((part.dtype.str, part.shape)).encode())
+            sha.update(np.ascontiguousarray(part).data)
+        else:
+            sha.update(repr(part).encode())
+    return sha.hexdigest()
+
+
+# On-disk cache of intermediate edge arrays keyed by source content and filter
+# parameters.  Least recently used entries go once the cache is over max_bytes.
+class EdgeCache:
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def key(self, *parts):
+        return hashlib.sha1(repr(parts).encode()).hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.directory, key + '.npy')
+
+    def get(self, key, mmap=False):
+        path = self.path(key)
+        try:
+            array = np.load(path, mmap_mode='r' if mmap else None)
+            # Reading counts as a use for the LRU order
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        return array
+
+    def put(self, key, array):
+        path = self.path(key)
+        temp = '{}.{}.tmp'.format(path, threading.get_ident())
+        with open(temp, 'wb') as f:
+            np.save(f, array)
+        os.replace(temp, path)
+        self.evict()
+
+    # Store a 2D uint8 array that arrives as bands of rows, for results too
+    # big to hold in one piece
+    def put_rows(self, key, shape, bands):
+        path = self.path(key)
+        temp = '{}.{}.tmp'.format(path, threading.get_ident())
+        with open(temp, 'wb') as f:
+            np.lib.format.write_array_header_1_0(
+                f, {'descr': '|u1', 'fortran_order': False, 'shape': shape})
+            for band in bands:
+                f.write(np.ascontiguousarray(band, dtype=np.uint8).data)
+        os.replace(temp, path)
+        self.evict()
+
+    def evict(self):
+        with self.lock:
+            entries = []
+            for entry in os.scandir(self.directory):
+                if entry.name.endswith('.npy'):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime_ns, stat.st_size,
+                                    entry.path))
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+                total -= size
+
+
+# Look an array up in the cache, computing and storing it on a miss
+def cached(cache, parts, compute):
+    if cache is None:
+        return compute()
+    key = cache.key(*parts)
+    array = cache.get(key)
+    if array is None:
+        array = compute()
+        cache.put(key, array)
+    return array
+
+
+# Manifest ##############################
+
+
+MANIFEST_VERSION = 1
+
+
+# Record of what has been made for each view of a reference set: its
+# source file, and for every stage the key of the inputs it was made from,
+# its parameters, the artifacts it wrote and how long it took.  A stage's
+# key is a content_digest of its inputs that includes the key of the stage
+# it reads from, so like make a change anywhere upstream makes everything
+# after it stale.  Kept as JSON, in a sidecar file by the batch script and
+# in a scene property by the add-on.  Views may be recorded from several
+# threads at once.
+class Manifest:
+    def __init__(self, data=None):
+        if not isinstance(data, dict) or \
+                data.get('version') != MANIFEST_VERSION:
+            data = {'version': MANIFEST_VERSION, 'views': {}}
+        self.data = data
+        self.lock = threading.Lock()
+
+    @classmethod
+    def from_json(cls, text):
+        try:
+            return cls(json.loads(text))
+        except ValueError:
+            return cls()
+
+    def to_json(self):
+        with self.lock:
+            return json.dumps(self.data, indent=1, sort_keys=True)
+
+    # The manifest in a sidecar file, empty when there is none yet
+    @classmethod
+    def load(cls, filename):
+        if not os.path.exists(filename):
+            return cls()
+        with open(filename) as json_file:
+            return cls.from_json(json_file.read())
+
+    def save(self, filename):
+        text = self.to_json()
+        with open(filename + '.tmp', 'w') as json_file:
+            json_file.write(text)
+        os.replace(filename + '.tmp', filename)
+
+    def view(self, name):
+        with self.lock:
+            return self.data['views'].setdefault(name, {'stages': {}})
+
+    # Content hash of a view's source file.  The one on record is reused
+    # while the file keeps its size and modification time, so unchanged
+    # sources are not read again in later sessions.  With compute False a
+    # file that would need reading gives None instead.
+    def source_digest(self, name, filepath, compute=True):
+        stat = os.stat(filepath)
+        stamp = [stat.st_size, stat.st_mtime_ns]
+        record = self.view(name)
+        source = record.get('source')
+        if source is not None and source['path'] == filepath and \
+                source['stamp'] == stamp:
+            return source['digest']
+        digest = file_digest(filepath) if compute else known_digest(filepath)
+        if digest is None:
+            return None
+        with self.lock:
+            record['source'] = {'path': filepath, 'stamp': stamp,
+                                'digest': digest}
+        return digest
+
+    # Key a view's stage was last made from, or None
+    def key(self, name, stage):
+        entry = self.view(name)['stages'].get(stage)
+        return None if entry is None else entry['key']
+
+    # True when a view's stage was last made from inputs with this key and
+    # every artifact it wrote still exists
+    def is_current(self, name, stage, key, exists=os.path.exists):
+        entry = self.view(name)['stages'].get(stage)
+        return entry is not None and entry['key'] == key and \
+            all(exists(artifact) for artifact in entry['artifacts'])
+
+    def record(self, name, stage, key, params, artifacts=(), timings=None):
+        entry = {'key': key, 'params': params,
+                 'artifacts': list(artifacts),
+                 'seconds': {label: round(seconds, 6) for label, seconds
+                             in (timings or {}).items()},
+                 'made': time.strftime('%Y-%m-%dT%H:%M:%S')}
+        record = self.view(name)
+        with self.lock:
+            record['stages'][stage] = entry
+
+
+# Placement ############################
+
+
+# Pixel to world transform of a reference image empty as a 3x4 matrix, so
+# world = transform @ (x, y, 1) for a pixel (x, y) counted from the bottom
+# left like edge_points, landing on the pixel centre.  size is the pixel
+# size the points were found at.  The empty shows its image display_size
+# along the longer side, at the aspect of image_size (size when None),
+# shifted by image_offset fractions of the picture, and matrix_world places
+# that in the scene, so one product covers every view and any rotation.
+def pixel_transform(matrix_world, display_size, size, image_size=None,
+                    image_offset=(-0.5, -0.5)):
+    x_pixels, y_pixels = size
+    shown_x, shown_y = size if image_size is None else image_size
+    extent_x = display_size * shown_x / max(shown_x, shown_y)
+    extent_y = display_size * shown_y / max(shown_x, shown_y)
+
+    # Pixels to the empty's local image plane
+    local = np.array([
+        [extent_x / x_pixels, 0, (0.5 / x_pixels + image_offset[0]) *
+         extent_x],
+        [0, extent_y / y_pixels, (0.5 / y_pixels + image_offset[1]) *
+         extent_y],
+        [0, 0, 0],
+        [0, 0, 1]])
+    return (np.asarray(matrix_world, dtype=np.float64) @ local)[:3]
+
+
+# World positions of (N, 2) or (N, 3) pixel points under a pixel_transform,
+# in one matrix multiply, as a float32 (N, 3) array
+def transform_points(transform, points):
+    pixels = np.asarray(points, dtype=np.float32)
+    if pixels.ndim != 2:
+        pixels = pixels.reshape(-1, 3)
+    transform = np.asarray(transform, dtype=np.float32)
+    verts = pixels[:, :2] @ transform[:, :2].T
+    verts += transform[:, 2]
+    return verts
+
+
+# Edge Index ############################
+
+
+# FLANN's single k-d tree, exact when searched without a check limit
+FLANN_INDEX_KDTREE_SINGLE = 4
+
+
+# Origin, unit in-plane axes as a (3, 2) array and unit normal of the image
+# plane of a reference empty's matrix_world
+def image_plane(matrix_world):
+    matrix = np.asarray(matrix_world, dtype=np.float64)
+    axes = matrix[:3, :2] / np.linalg.norm(matrix[:3, :2], axis=0)
+    normal = np.cross(axes[:, 0], axes[:, 1])
+    return matrix[:3, 3], axes, normal / np.linalg.norm(normal)
+
+
+# Nearest neighbour index over the (N, 3) world space vertices of a view's
+# edge mesh.  The vertices lie in the view's image plane, so they are
+# indexed by their 2D coordinates in it.  A 3D tree that splits on x, y and
+# z in turn, like mathutils.kdtree, can't prune on the flat axis and slows
+# down badly on such points.  Queries go to OpenCV in one batch.
+#
+# A simplified contour mesh passes its (M, 2) edges too.  Its vertices are
+# only the corners of long segments, so points are laid along every
+# segment no further apart than its shortest one (a pixel for traced
+# contours) and indexed with the segment they lie on.  A query is projected
+# onto the segments of its nearest few of those, which lands within half
+# that spacing of the nearest point of any edge, and on it in practice.
+class EdgeIndex:
+    # Segment points whose segments are tried for each query
+    NEIGHBOURS = 8
+
+    # Most segment points laid per edge on average, however short the
+    # shortest segment is
+    MAX_SAMPLES = 16
+
+    def __init__(self, verts, matrix_world, edges=None):
+        self.origin, self.axes, self.normal = image_plane(matrix_world)
+        self.verts = np.asarray(verts, dtype=np.float32).reshape(-1, 3)
+        self.coords = self.plane_coords(self.verts)
+        self.index = cv.flann_Index(
+            self.coords, dict(algorithm=FLANN_INDEX_KDTREE_SINGLE))
+
+        self.edges = None
+        if edges is not None and len(edges):
+            self.edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+            self.index_segments()
+
+    def __len__(self):
+        return len(self.verts)
+
+    def plane_coords(self, points):
+        return np.ascontiguousarray((points - self.origin) @ self.axes,
+                                    dtype=np.float32)
+
+    # Points along every segment, each knowing its segment, in their own
+    # index
+    def index_segments(self):
+        start = self.coords[self.edges[:, 0]].astype(np.float64)
+        along = self.coords[self.edges[:, 1]] - start
+        length = np.hypot(along[:, 0], along[:, 1])
+        spacing = max(length[length > 0].min(initial=1.0),
+                      length.sum() / (self.MAX_SAMPLES * len(length)))
+        pieces = np.ceil(length / spacing).astype(np.int64) + 1
+        self.sample_edge = np.repeat(np.arange(len(length)), pieces)
+        firsts = np.cumsum(pieces) - pieces
+        t = (np.arange(pieces.sum()) - np.repeat(firsts, pieces)) / \
+            np.maximum(np.repeat(pieces, pieces) - 1, 1)
+        samples = start[self.sample_edge] + \
+            t[:, None] * along[self.sample_edge]
+        self.samples = np.ascontiguousarray(samples, dtype=np.float32)
+        self.segment_index = cv.flann_Index(
+            self.samples, dict(algorithm=FLANN_INDEX_KDTREE_SINGLE))
+
+    # Nearest edge vertex to each of (N, 3) world points, measured in the
+    # image plane, as (vertex indices, distances)
+    def nearest(self, points):
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+        found, squared = self.index.knnSearch(
+            self.plane_coords(points), 1, params=dict(checks=-1))
+        return found[:, 0], np.sqrt(squared[:, 0])
+
+    # Nearest point on the edges to each of (N, 3) world points, as world
+    # space (N, 3) points and their distances in the image plane.  Without
+    # segments that is the nearest vertex.
+    def nearest_points(self, points):
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+        if self.edges is None:
+            found, distance = self.nearest(points)
+            return self.verts[found].astype(np.float64), distance
+
+        query = self.plane_coords(points)
+        k = min(self.NEIGHBOURS, len(self.samples))
+        found = self.segment_index.knnSearch(query, k,
+                                             params=dict(checks=-1))[0]
+        segments = self.edges[self.sample_edge[found]]
+
+        # Each query against the segments of its k points, all at once
+        start = self.coords[segments[..., 0]].astype(np.float64)
+        along = self.coords[segments[..., 1]] - start
+        length = (along * along).sum(axis=2)
+        length[length == 0] = 1
+        offset = query[:, None].astype(np.float64) - start
+        t = np.clip((offset * along).sum(axis=2) / length, 0, 1)
+        apart = offset - t[..., None] * along
+        squared = (apart * apart).sum(axis=2)
+
+        rows = np.arange(len(points))
+        best = squared.argmin(axis=1)
+        ends = segments[rows, best]
+        t = t[rows, best, None]
+        verts = self.verts.astype(np.float64)
+        target = verts[ends[:, 0]] * (1 - t) + verts[ends[:, 1]] * t
+        return target, np.sqrt(squared[rows, best])
+
+    # (N, 3) world points moved within the image plane onto the nearest
+    # point of the edges, keeping their height above the plane, and which
+    # of them moved.  Points farther than max_distance from every edge stay
+    # where they are, 0 snaps them however far.
+    def snap(self, points, max_distance=0.0):
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+        target, distance = self.nearest_points(points)
+        lift = (points - target) @ self.normal
+        snapped = target + lift[:, None] * self.normal
+        moved = np.ones(len(points), dtype=bool)
+        if max_distance > 0:
+            moved = distance <= max_distance
+            snapped[~moved] = points[~moved]
+        return snapped, moved
+
+
+# Measurement ###########################
+
+
+# Closes small gaps in an outline so it traces as one external contour
+EXTENT_KERNEL = cv.getStructuringElement(cv.MORPH_RECT, (5, 5))
+
+# Contours whose box spans this much of the image width and height are
+# taken for a frame or border drawn around the views
+FRAME_FRACTION = 0.95
+
+
+# Cut off both ends of an edge pixel projection holding percent of the
+# pixels each, as (first, last) index, or None for an empty projection
+def trimmed_span(counts, percent):
+    total = np.cumsum(counts, dtype=np.int64)
+    if total[-1] == 0:
+        return None
+    cut = total[-1] * percent / 100
+    first = np.searchsorted(total, cut, side='right')
+    last = np.searchsorted(total, total[-1] - cut, side='left')
+    return int(first), int(max(first, last))
+
+
+# Bounding box (x, y, width, height) in pixels, rows from the top, of the
+# dominant object in an edge map, or None when there are no edges.
+# 'CONTOUR' takes the contour with the largest bounding box once small gaps
+# in the outline are closed, passing over frames around the whole image.
+# 'PERCENTILE' takes the box left after trimming percent of the edge pixels
+# off each side, which ignores specks and stray text at the margins.
+def object_extent(edges, method='CONTOUR', percent=1.0):
+    if edges.ndim == 3:
+        edges = edges[..., 0]
+    if method == 'PERCENTILE':
+        mask = edges >= 128
+        columns = trimmed_span(np.count_nonzero(mask, axis=0), percent)
+        rows = trimmed_span(np.count_nonzero(mask, axis=1), percent)
+        if columns is None:
+            return None
+        return (columns[0], rows[0], columns[1] - columns[0] + 1,
+                rows[1] - rows[0] + 1)
+
+    closed = cv.morphologyEx(np.ascontiguousarray(edges), cv.MORPH_CLOSE,
+                             EXTENT_KERNEL)
+    # Every contour, not just the outermost, so an object inside a frame
+    # is found too
+    contours, hierarchy = cv.findContours(closed, cv.RETR_LIST,
+                                          cv.CHAIN_APPROX_SIMPLE)
+    if len(contours) == 0:
+        return None
+    boxes = np.array([cv.boundingRect(c) for c in contours])
+    height, width = edges.shape
+    frames = (boxes[:, 2] >= FRAME_FRACTION * width) & \
+        (boxes[:, 3] >= FRAME_FRACTION * height)
+    if not frames.all():
+        boxes = boxes[~frames]
+    return tuple(int(v) for v in boxes[np.argmax(boxes[:, 2] * boxes[:, 3])])
+
+
+# Alignment #############################
+
+
+# Weight of a known extent against the views' own measurements
+TARGET_WEIGHT = 100.0
+
+
+# Joint scale and shift of reference views that makes the object they show
+# agree along every world axis (0, 1, 2) two of them share.  Each of the
+# views is given along its image x and y as (n, 2) arrays: the world axis
+# it runs along, the object's world size and centre coordinate there, and
+# the coordinate of the view's pivot, the point it scales about.  A view
+# keeps its aspect, so it gets one factor.  Factors and the object's extent
+# on each axis are fitted by least squares in log space, where
+# log factor + log size = log extent is linear.  targets are known extents
+# (0 for unknown) that set the overall scale, without them the views keep
+# their geometric mean scale.  The views are then shifted so the object's
+# centres meet, at the world origin with origin or at their mean.  Returns
+# the factors, the (n, 2) shifts, the fitted extent per axis (nan where no
+# view sees it) and the (n, 2) relative size mismatch left per view.
+def align_views(axes, sizes, centres, pivots, targets=(0, 0, 0),
+                origin=False):
+    axes = np.asarray(axes, dtype=np.intp)
+    sizes = np.asarray(sizes, dtype=np.float64)
+    centres = np.asarray(centres, dtype=np.float64)
+    pivots = np.asarray(pivots, dtype=np.float64)
+    count = len(axes)
+
+    system = np.zeros((2 * count, count + 3))
+    equations = np.arange(2 * count)
+    system[equations, equations // 2] = 1
+    system[equations, count + axes.ravel()] = -1
+    rhs = -np.log(sizes.ravel())
+
+    seen = np.isin(np.arange(3), axes)
+    known = [axis for axis in range(3) if targets[axis] > 0 and seen[axis]]
+    extra = np.zeros((max(len(known), 1), count + 3))
+    if known:
+        extra[np.arange(len(known)), count + np.array(known)] = TARGET_WEIGHT
+        extra_rhs = TARGET_WEIGHT * np.log([targets[a] for a in known])
+    else:
+        extra[0, :count] = 1
+        extra_rhs = np.zeros(1)
+    solution = np.linalg.lstsq(np.vstack([system, extra]),
+                               np.concatenate([rhs, extra_rhs]),
+                               rcond=None)[0]
+
+    factors = np.exp(solution[:count])
+    extents = np.where(seen, np.exp(solution[count:]), np.nan)
+    mismatch = factors[:, None] * sizes / extents[axes] - 1
+
+    scaled = pivots + factors[:, None] * (centres - pivots)
+    meet = np.zeros(3)
+    if not origin:
+        for axis in np.flatnonzero(seen):
+            meet[axis] = scaled[axes == axis].mean()
+    return factors, meet[axes] - scaled, extents, mismatch
+
+
+# Reference Files #######################
+
+
+# View a reference image file is for, from the view name in the file name
+def file_view(filename):
+    for name in VIEW_NAMES:
+        if name in filename.lower():
+            return name
+    return None
+
+
+# Suffixes of the images Image Voodoo writes itself, e.g. top.png-canny.png
+OUTPUT_SUFFIXES = ('-canny', '-contours', '-proxy', '-preview')
+
+
+# Graphics files in a directory that have proper view names in them, paired
+# with their view.  Canny and contour images written next to the sources
+# are left out, so a re-run does not take them for more views.
+def reference_files(directory):
+    return [(file, file_view(file))
+            for file in sorted(os.listdir(directory))
+            if file.lower().endswith(tuple(IMAGE_ENDINGS))
+            and not os.path.splitext(file)[0].lower().endswith(
+                OUTPUT_SUFFIXES)
+            and file_view(file) is not None]
+
+
+# Width and height read from the file header.  PIL only decodes pixels on
+# demand, so this stays cheap for any image size.
+def image_size(filepath):
+    with Image.open(filepath) as image:
+        return image.size
+
+
+def probe_sizes(filepaths, workers=None):
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(image_size, filepaths))
+
+
+# Proxies ###############################
+
+
+# Size of a display proxy whose longest side is max_edge, or None when the
+# image is already small enough to show as it is
+def proxy_shape(size, max_edge):
+    width, height = size
+    if max(width, height) <= max_edge:
+        return None
+    scale = max_edge / max(width, height)
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+# Area averaged copy of an image array with its longest side cut to max_edge
+def shrink(array, max_edge):
+    shape = proxy_shape(array.shape[1::-1], max_edge)
+    if shape is None:
+        return array
+    return cv.resize(array, shape, interpolation=cv.INTER_AREA)
+
+
+# PNG file bytes of an image array, shrunk for display first when max_edge
+# is given
+def encode_png(array, max_edge=None):
+    if max_edge is not None:
+        array = shrink(array, max_edge)
+    return cv.imencode('.png', array)[1].tobytes()
+
+
+# OpenCV can decode at 1/2, 1/4 and 1/8 size, which for JPEGs skips most of
+# the full decode
+REDUCED_READS = [(8, cv.IMREAD_REDUCED_COLOR_8),
+                 (4, cv.IMREAD_REDUCED_COLOR_4),
+                 (2, cv.IMREAD_REDUCED_COLOR_2)]
+
+
+# Decode a reference file straight to proxy size as a BGR array.  The
+# reduced decode rounds its size, so the result is resized to the
+# proxy_shape of the full size to keep the aspect the plane is given.
+def proxy_pixels(filepath, max_edge, size=None):
+    if size is None:
+        size = image_size(filepath)
+    flag = cv.IMREAD_COLOR
+    for factor, reduced in REDUCED_READS:
+        if max(size) // factor >= max_edge:
+            flag = reduced
+            break
+    image = cv.imread(filepath, flag)
+    shape = proxy_shape(size, max_edge)
+    if shape is None or image.shape[1::-1] == shape:
+        return image
+    return cv.resize(image, shape, interpolation=cv.INTER_AREA)